@@ -5,6 +5,7 @@ import asyncio
 import logging
 import os
 import sys
+from pathlib import Path
 
 from strava_mcp.oauth_server import get_refresh_token_from_oauth
 
@@ -40,9 +41,8 @@ async def main():
         print(f"export STRAVA_REFRESH_TOKEN={token}")
         print("=================================================================\n")
 
-        # Also write to a file for easy access
-        with open("strava_token.txt", "w") as f:
-            f.write(f"STRAVA_REFRESH_TOKEN={token}\n")
+        # Also write to a file for easy access, off the event loop
+        await asyncio.to_thread(Path("strava_token.txt").write_text, f"STRAVA_REFRESH_TOKEN={token}\n")
         print("Token also saved to strava_token.txt\n")
 
     except Exception as e:
@@ -52,4 +52,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+
+        loop_factory = uvloop.new_event_loop
+    except ImportError:  # uvloop is not available on Windows
+        loop_factory = None
+
+    asyncio.run(main(), loop_factory=loop_factory)
@@ -1,19 +1,54 @@
+import asyncio
+import json
 import logging
-from datetime import datetime
+import os
+import time
+from pathlib import Path
 
 import httpx
 from fastapi import FastAPI
 from httpx import Response
+from pydantic import ValidationError
 
 from strava_mcp.config import StravaSettings
-from strava_mcp.models import Activity, DetailedActivity, ErrorResponse, SegmentEffort
+from strava_mcp.models import (
+    ACTIVITY_LIST_ADAPTER,
+    SEGMENT_EFFORT_LIST_ADAPTER,
+    Activity,
+    DetailedActivity,
+    ErrorResponse,
+    SegmentEffort,
+)
 
 logger = logging.getLogger(__name__)
 
+# Shared TLS context so each client doesn't re-parse the CA bundle
+_SSL_CONTEXT = httpx.create_ssl_context()
+
+# Maximum number of GET response bodies kept for ETag revalidation
+_ETAG_CACHE_SIZE = 128
+
+# Maximum number of pages get_activity_pages fetches in one call
+_MAX_ACTIVITY_PAGES = 10
+
+# Detailed activities rarely change, so recently fetched ones are served from memory
+_ACTIVITY_CACHE_SIZE = 256
+
+
+def _with_elevation_gain(segment: dict) -> dict:
+    """Return the segment, with total_elevation_gain derived from its elevation range if missing."""
+    if "total_elevation_gain" in segment:
+        return segment
+    gain = max(0, segment.get("elevation_high", 0) - segment.get("elevation_low", 0))
+    return {**segment, "total_elevation_gain": gain}
+
 
 class StravaAPI:
     """Client for the Strava API."""
 
+    # Seconds before the reported expiry at which an access token is refreshed
+    _TOKEN_EXPIRY_SKEW = 60
+
     def __init__(self, settings: StravaSettings, app: FastAPI | None = None):
         """Initialize the Strava API client.
 
@@ -22,17 +57,58 @@ class StravaAPI:
             app: FastAPI app (not used, kept for backward compatibility)
         """
         self.settings = settings
+        # Settings are immutable; the refresh token is tracked here because Strava may rotate it
+        self.refresh_token = settings.refresh_token
         self.access_token = None
-        self.token_expires_at = None
+        self.token_expires_at: float | None = None
         self.auth_flow_in_progress = False
+        # Refresh in progress, shared by every caller that finds the token expired
+        self._refresh_task: asyncio.Task[str] | None = None
+        # (url, query) -> (ETag, body) for conditional GETs
+        self._etag_cache: dict[tuple[str, str], tuple[str, bytes]] = {}
+        # (activity_id, include_all_efforts) -> (expiry, activity, ETag it was parsed from),
+        # plus fetches in flight
+        self._activity_cache: dict[tuple[int, bool], tuple[float, DetailedActivity, str | None]] = {}
+        self._activity_fetches: dict[tuple[int, bool], asyncio.Task[DetailedActivity]] = {}
+        # All API calls target the same host, so keep connections warm and let
+        # concurrent requests multiplex over a single HTTP/2 connection.
         self._client = httpx.AsyncClient(
             base_url=settings.base_url,
-            timeout=30.0,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            verify=_SSL_CONTEXT,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+        )
+        # Token refreshes go to a different host; keep a dedicated client so the
+        # connection to www.strava.com is reused across refreshes.
+        self._oauth_client = httpx.AsyncClient(
+            base_url="https://www.strava.com",
+            timeout=10.0,
+            verify=_SSL_CONTEXT,
+            limits=httpx.Limits(max_keepalive_connections=2),
         )
+        if settings.token_cache_path:
+            self._load_token_cache(Path(settings.token_cache_path).expanduser())
+
+    @property
+    def access_token(self) -> str | None:
+        """The current access token."""
+        return self._access_token
+
+    @access_token.setter
+    def access_token(self, value: str | None):
+        self._access_token = value
+        # Build the request headers once per token instead of on every request
+        self._auth_headers = {"Authorization": f"Bearer {value}"}
 
     async def close(self):
-        """Close the HTTP client."""
+        """Close the HTTP clients."""
         await self._client.aclose()
+        await self._oauth_client.aclose()
 
     async def setup_auth_routes(self):
         """This method is deprecated and does nothing now.
@@ -65,27 +141,58 @@ class StravaAPI:
         Raises:
             Exception: If unable to obtain a valid token
         """
-        now = datetime.now().timestamp()
-
         # If token is still valid, return it
-        if self.access_token and self.token_expires_at and now < self.token_expires_at:
+        token = self._valid_token()
+        if token:
+            return token
+
+        # Join the refresh already in flight, or start one. Shielding keeps a
+        # cancelled caller from aborting the refresh the others are waiting on.
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_access_token())
+            self._refresh_task.add_done_callback(self._clear_refresh_task)
+        return await asyncio.shield(self._refresh_task)
+
+    def _clear_refresh_task(self, task: asyncio.Task[str]):
+        """Forget a finished refresh so the next expiry starts a new one."""
+        if self._refresh_task is task:
+            self._refresh_task = None
+
+    def _valid_token(self) -> str | None:
+        """Return the cached access token if it can still be used.
+
+        Tokens are treated as expired _TOKEN_EXPIRY_SKEW seconds early so that a
+        token which is valid when checked does not expire while the request is in flight.
+        """
+        if not self.access_token or not self.token_expires_at:
+            return None
+        if time.time() < self.token_expires_at - self._TOKEN_EXPIRY_SKEW:
             return self.access_token
+        return None
+
+    async def _refresh_access_token(self) -> str:
+        """Obtain a new access token from the refresh token.
+
+        Returns:
+            The new access token
 
+        Raises:
+            Exception: If unable to obtain a valid token
+        """
         # If we don't have a refresh token, try to get one through standalone OAuth flow
-        if not self.settings.refresh_token:
+        if not self.refresh_token:
             logger.warning("No refresh token available, launching standalone OAuth server")
             try:
                 # Import here to avoid circular import
                 from strava_mcp.oauth_server import get_refresh_token_from_oauth
 
                 logger.info("Starting OAuth flow to get refresh token")
-                self.settings.refresh_token = await get_refresh_token_from_oauth(
+                self.refresh_token = await get_refresh_token_from_oauth(
                     self.settings.client_id, self.settings.client_secret
                 )
                 logger.info("Successfully obtained refresh token from OAuth flow")
             except Exception as e:
-                error_msg = f"Failed to get refresh token through OAuth flow: {e}"
-                logger.error(error_msg)
+                logger.error("Failed to get refresh token through OAuth flow: %s", e)
 
                 # No fallback to MCP-integrated auth flow anymore
                 raise Exception(
@@ -94,32 +201,79 @@ class StravaAPI:
                 ) from e
 
         # Now that we have a refresh token, refresh the access token
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://www.strava.com/oauth/token",
-                json={
-                    "client_id": self.settings.client_id,
-                    "client_secret": self.settings.client_secret,
-                    "refresh_token": self.settings.refresh_token,
-                    "grant_type": "refresh_token",
-                },
-            )
-
-            if response.status_code != 200:
-                error_msg = f"Failed to refresh token: {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-
-            data = response.json()
-            self.access_token = data["access_token"]
-            self.token_expires_at = data["expires_at"]
-
-            # Update the refresh token if it changed
-            if "refresh_token" in data:
-                self.settings.refresh_token = data["refresh_token"]
-
-            logger.info("Successfully refreshed access token")
-            return self.access_token
+        # Form-encoded, like the authorization-code exchange in StravaAuthenticator
+        response = await self._oauth_client.post(
+            "/oauth/token",
+            data={
+                "client_id": self.settings.client_id,
+                "client_secret": self.settings.client_secret,
+                "refresh_token": self.refresh_token,
+                "grant_type": "refresh_token",
+            },
+        )
+
+        if response.status_code != 200:
+            logger.error("Failed to refresh token: %s", response.text[:200])
+            raise Exception(f"Failed to refresh token: {response.text}")
+
+        data = response.json()
+        access_token: str = data["access_token"]
+        self.access_token = access_token
+        self.token_expires_at = float(data["expires_at"])
+
+        # Update the refresh token if it changed
+        if "refresh_token" in data:
+            self.refresh_token = data["refresh_token"]
+
+        logger.info("Successfully refreshed access token")
+
+        if self.settings.token_cache_path:
+            try:
+                await asyncio.to_thread(self._save_token_cache, Path(self.settings.token_cache_path).expanduser())
+            except OSError as e:
+                logger.warning("Failed to write token cache: %s", e)
+
+        return access_token
+
+    def _load_token_cache(self, path: Path):
+        """Restore tokens persisted by a previous run.
+
+        A still-valid access token lets the first request skip the refresh round trip.
+        A missing or unreadable cache file is ignored.
+
+        Args:
+            path: The token cache file
+        """
+        try:
+            data = json.loads(path.read_text())
+            expires_at = float(data["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+
+        # The cached refresh token is newer than the configured one if Strava rotated it
+        if data.get("refresh_token"):
+            self.refresh_token = data["refresh_token"]
+
+        if time.time() < expires_at - self._TOKEN_EXPIRY_SKEW:
+            self.access_token = data.get("access_token")
+            self.token_expires_at = expires_at
+
+    def _save_token_cache(self, path: Path):
+        """Atomically write the current tokens to the cache file, readable only by the owner.
+
+        Args:
+            path: The token cache file
+        """
+        data = {
+            "access_token": self.access_token,
+            "expires_at": self.token_expires_at,
+            "refresh_token": self.refresh_token,
+        }
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
 
     async def _request(self, method: str, endpoint: str, **kwargs) -> Response:
         """Make a request to the Strava API.
@@ -135,28 +289,63 @@ class StravaAPI:
         Raises:
             Exception: If the request fails
         """
-        token = await self._ensure_token()
-        headers = {"Authorization": f"Bearer {token}"}
+        await self._ensure_token()
+        # The shared header dict is only copied when something needs to be added to it
+        headers = self._auth_headers
         if "headers" in kwargs:
-            headers.update(kwargs.pop("headers"))
+            headers = {**headers, **kwargs.pop("headers")}
 
         url = endpoint if endpoint.startswith("/") else f"/{endpoint}"
+
+        # Revalidate previously seen GETs so Strava can answer with an empty 304
+        cache_key = None
+        if method == "GET":
+            cache_key = (url, str(httpx.QueryParams(kwargs.get("params"))))
+            cached = self._etag_cache.get(cache_key)
+            if cached:
+                headers = {**headers, "If-None-Match": cached[0]}
+
         response = await self._client.request(method, url, headers=headers, **kwargs)
 
+        if cache_key:
+            if response.status_code == 304 and cache_key in self._etag_cache:
+                etag, content = self._etag_cache[cache_key]
+                return Response(200, headers={"ETag": etag}, content=content, request=response.request)
+            etag = response.headers.get("ETag")
+            if response.is_success and etag:
+                self._cache_etag(cache_key, etag, response.content)
+
         if not response.is_success:
-            error_msg = f"Strava API request failed: {response.status_code} - {response.text}"
-            logger.error(error_msg)
+            # Only the head of the body is logged, so don't decode the rest (error pages can be large)
+            body = response.content[:200].decode("utf-8", errors="replace")
+            logger.error("Strava API request failed: %d - %s", response.status_code, body)
 
-            try:
-                error_data = response.json()
-                error = ErrorResponse(**error_data)
-                raise Exception(f"Strava API error: {error.message} (code: {error.code})")
-            except Exception as err:
-                msg = f"Strava API failed: {response.status_code} - {response.text[:50]}"
-                raise Exception(msg) from err
+            # Only JSON bodies can carry a structured error; skip parsing HTML error pages
+            if response.headers.get("content-type", "").startswith("application/json"):
+                try:
+                    error = ErrorResponse.model_validate_json(response.content)
+                except ValidationError:
+                    pass
+                else:
+                    raise Exception(f"Strava API error: {error.message} (code: {error.code})")
+
+            raise Exception(f"Strava API failed: {response.status_code} - {body[:50]}")
 
         return response
 
+    def _cache_etag(self, key: tuple[str, str], etag: str, content: bytes):
+        """Remember a response body for conditional GETs, evicting the oldest entry when full.
+
+        Args:
+            key: The (url, query) cache key
+            etag: The ETag returned by Strava
+            content: The response body to serve on a 304
+        """
+        self._etag_cache.pop(key, None)
+        if len(self._etag_cache) >= _ETAG_CACHE_SIZE:
+            del self._etag_cache[next(iter(self._etag_cache))]
+        self._etag_cache[key] = (etag, content)
+
     async def get_activities(
         self,
         before: int | None = None,
@@ -175,16 +364,72 @@ class StravaAPI:
         Returns:
             List of activities
         """
-        params = {"page": page, "per_page": per_page}
-        if before:
-            params["before"] = before
-        if after:
-            params["after"] = after
+        params = {
+            key: value
+            for key, value in (("page", page), ("per_page", per_page), ("before", before), ("after", after))
+            if value is not None
+        }
 
         response = await self._request("GET", "/athlete/activities", params=params)
-        data = response.json()
 
-        return [Activity(**activity) for activity in data]
+        if self.settings.skip_validation:
+            return [Activity._from_strava(activity) for activity in json.loads(response.content)]
+
+        # Decode and validate the raw bytes in one pass, without an intermediate list of dicts
+        return ACTIVITY_LIST_ADAPTER.validate_json(response.content)
+
+    async def get_activity_pages(
+        self,
+        before: int | None = None,
+        after: int | None = None,
+        start_page: int = 1,
+        end_page: int = 5,
+        per_page: int = 30,
+        max_concurrency: int = 5,
+    ) -> list[Activity]:
+        """Get a range of activity pages for the authenticated athlete, fetching them concurrently.
+
+        Pages are requested in batches of max_concurrency, and fetching stops at the
+        first page that comes back short, since every later page would be empty.
+
+        Args:
+            before: An epoch timestamp for filtering activities before a certain time
+            after: An epoch timestamp for filtering activities after a certain time
+            start_page: First page number to fetch
+            end_page: Last page number to fetch (inclusive)
+            per_page: Number of items per page
+            max_concurrency: Maximum number of pages requested at once
+
+        Returns:
+            List of activities from all pages, in page order
+
+        Raises:
+            ValueError: If the page range is inverted or spans more than 10 pages,
+                or if start_page, per_page or max_concurrency is less than 1
+        """
+        if start_page < 1:
+            raise ValueError("start_page must be at least 1")
+        if end_page < start_page:
+            raise ValueError("end_page must not be before start_page")
+        # Strava allows 100 requests per 15 minutes, so one call may only use a few of them
+        if end_page - start_page + 1 > _MAX_ACTIVITY_PAGES:
+            raise ValueError(f"At most {_MAX_ACTIVITY_PAGES} pages can be fetched at once")
+        # Either would keep the batching loop from ever finishing
+        if per_page < 1:
+            raise ValueError("per_page must be at least 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        activities: list[Activity] = []
+        for batch_start in range(start_page, end_page + 1, max_concurrency):
+            batch = range(batch_start, min(batch_start + max_concurrency, end_page + 1))
+            pages = await asyncio.gather(*(self.get_activities(before, after, page, per_page) for page in batch))
+            for page in pages:
+                activities.extend(page)
+                if len(page) < per_page:
+                    return activities
+
+        return activities
 
     async def get_activity(self, activity_id: int, include_all_efforts: bool = False) -> DetailedActivity:
         """Get a specific activity.
@@ -196,14 +441,53 @@ class StravaAPI:
         Returns:
             The activity details
         """
-        params = {}
-        if include_all_efforts:
-            params["include_all_efforts"] = "true"
+        key = (activity_id, include_all_efforts)
+        cached = self._activity_cache.get(key)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+
+        # Concurrent lookups of the same activity share a single request
+        task = self._activity_fetches.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_activity(activity_id, include_all_efforts))
+            self._activity_fetches[key] = task
+            task.add_done_callback(lambda _: self._activity_fetches.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_activity(self, activity_id: int, include_all_efforts: bool) -> DetailedActivity:
+        """Fetch an activity from Strava and cache it.
 
+        Args:
+            activity_id: The ID of the activity
+            include_all_efforts: Whether to include all segment efforts
+
+        Returns:
+            The activity details
+        """
+        params = {"include_all_efforts": "true"} if include_all_efforts else {}
+
+        key = (activity_id, include_all_efforts)
         response = await self._request("GET", f"/activities/{activity_id}", params=params)
-        data = response.json()
 
-        return DetailedActivity(**data)
+        # An unchanged ETag (e.g. after a 304) means the expired entry still matches Strava,
+        # so the activity is reused instead of being parsed again
+        etag = response.headers.get("ETag")
+        stale = self._activity_cache.get(key)
+        if stale and etag and stale[2] == etag:
+            activity = stale[1]
+        elif self.settings.skip_validation:
+            activity = DetailedActivity._from_strava(json.loads(response.content))
+        else:
+            activity = DetailedActivity.model_validate_json(response.content)
+
+        ttl = self.settings.cache_ttl_seconds
+        if ttl > 0:
+            self._activity_cache.pop(key, None)
+            if len(self._activity_cache) >= _ACTIVITY_CACHE_SIZE:
+                del self._activity_cache[next(iter(self._activity_cache))]
+            self._activity_cache[key] = (time.monotonic() + ttl, activity, etag)
+
+        return activity
 
     async def get_activity_segments(self, activity_id: int) -> list[SegmentEffort]:
         """Get segments from a specific activity.
@@ -219,20 +503,18 @@ class StravaAPI:
         if not activity.segment_efforts:
             return []
 
-        # Add missing required fields before validation
-        segment_efforts = []
-        for effort in activity.segment_efforts:
-            # Add activity_id which is required by the model
-            effort["activity_id"] = activity_id
-            # Add segment_id which is required by the model
-            effort["segment_id"] = effort["segment"]["id"]
-            # Add total_elevation_gain to the segment if it's missing
-            if "total_elevation_gain" not in effort["segment"]:
-                # Calculate from elevation high and low or set to 0
-                elev_high = effort["segment"].get("elevation_high", 0)
-                elev_low = effort["segment"].get("elevation_low", 0)
-                effort["segment"]["total_elevation_gain"] = max(0, elev_high - elev_low)
-
-            segment_efforts.append(SegmentEffort.model_validate(effort))
-
-        return segment_efforts
+        # Add missing required fields on copies, leaving the (cached) activity untouched,
+        # and derive total_elevation_gain from the elevation range if Strava omitted it
+        efforts = [
+            {
+                **effort,
+                "activity_id": activity_id,
+                "segment_id": effort["segment"]["id"],
+                "segment": _with_elevation_gain(effort["segment"]),
+            }
+            for effort in activity.segment_efforts
+        ]
+
+        if self.settings.skip_validation:
+            return [SegmentEffort._from_strava(effort) for effort in efforts]
+        return SEGMENT_EFFORT_LIST_ADAPTER.validate_python(efforts)
@@ -1,6 +1,8 @@
 import asyncio
 import logging
 import os
+import secrets
+import sys
 import webbrowser
 from urllib.parse import urlencode
 
@@ -17,6 +19,41 @@ TOKEN_URL = "https://www.strava.com/oauth/token"
 REDIRECT_PORT = 3008
 REDIRECT_HOST = "127.0.0.1"
 
+# Shared TLS context so token exchanges don't re-parse the CA bundle
+_SSL_CONTEXT = httpx.create_ssl_context()
+
+# Static pages returned by the OAuth callback, encoded once at import
+_SUCCESS_HTML = b"<h1>Authorization successful!</h1><p>You can close this tab and return to the application.</p>"
+_FAILURE_HTML = b"<h1>Authorization failed!</h1><p>An error occurred. Please check the logs.</p>"
+
+
+def _settle_future(future: asyncio.Future, result: str | None = None, error: Exception | None = None):
+    """Resolve a flow's future on the event loop that owns it.
+
+    The callback usually runs on the same loop as the waiting flow, in which case
+    the future is resolved directly. Otherwise the result is handed over with
+    call_soon_threadsafe so the waiting loop wakes up immediately.
+
+    Args:
+        future: The future to resolve
+        result: The refresh token to set as the result
+        error: The exception to set instead of a result
+    """
+
+    def settle():
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    loop = future.get_loop()
+    if loop is asyncio.get_running_loop():
+        settle()
+    else:
+        loop.call_soon_threadsafe(settle)
+
 
 class TokenResponse(BaseModel):
     """Response model for Strava token exchange."""
@@ -39,6 +76,7 @@ class StravaAuthenticator:
         redirect_path: str = "/exchange_token",
         host: str = REDIRECT_HOST,
         port: int = REDIRECT_PORT,
+        client: httpx.AsyncClient | None = None,
     ):
         """Initialize the authenticator.
 
@@ -49,6 +87,7 @@ class StravaAuthenticator:
             redirect_path: Path for the redirect URI
             host: Host for the redirect URI
             port: Port for the redirect URI
+            client: Persistent HTTP client for token exchanges (optional, owned by the caller)
         """
         self.client_id = client_id
         self.client_secret = client_secret
@@ -58,36 +97,52 @@ class StravaAuthenticator:
         self.redirect_uri = f"http://{host}:{port}{redirect_path}"
         self.refresh_token = None
         self.token_future = None
+        # Futures of in-flight authorization flows, keyed by their OAuth state parameter
+        self._pending: dict[str, asyncio.Future] = {}
         self.app = app
+        self.client = client
 
-    async def exchange_token(self, code: str = Query(...)):
+    async def exchange_token(self, code: str = Query(...), state: str | None = None):
         """Exchange the authorization code for a refresh token.
 
         Args:
             code: The authorization code from Strava
+            state: The state parameter identifying the authorization flow
 
         Returns:
-            HTML response indicating success or failure
+            HTML response indicating success or failure, with status 400 if the
+            state does not match a pending flow
         """
+        # Only the flow that issued this state may be resolved. A callback without a
+        # state is accepted only while no state has been issued (single-flow servers).
+        if state:
+            future = self._pending.pop(state, None)
+            if future is None:
+                logger.warning("Rejecting OAuth callback with an unknown state")
+                return HTMLResponse(_FAILURE_HTML, status_code=400)
+        elif self._pending:
+            logger.warning("Rejecting OAuth callback without a state")
+            return HTMLResponse(_FAILURE_HTML, status_code=400)
+        else:
+            future = self.token_future
+
         try:
             # Exchange the code for tokens
             token_data = await self._exchange_code_for_token(code)
 
             # If we have a token future (waiting for token), set the result
-            if self.token_future and not self.token_future.done():
-                self.token_future.set_result(token_data.refresh_token)
+            if future and not future.done():
+                _settle_future(future, result=token_data.refresh_token)
 
-            return HTMLResponse(
-                "<h1>Authorization successful!</h1><p>You can close this tab and return to the application.</p>"
-            )
+            return HTMLResponse(_SUCCESS_HTML)
         except Exception as e:
             logger.exception("Error during token exchange")
 
             # If we have a token future (waiting for token), set the exception
-            if self.token_future and not self.token_future.done():
-                self.token_future.set_exception(e)
+            if future and not future.done():
+                _settle_future(future, error=e)
 
-            return HTMLResponse("<h1>Authorization failed!</h1><p>An error occurred. Please check the logs.</p>")
+            return HTMLResponse(_FAILURE_HTML)
 
     async def _exchange_code_for_token(self, code: str) -> TokenResponse:
         """Exchange the authorization code for tokens.
@@ -101,30 +156,34 @@ class StravaAuthenticator:
         Raises:
             Exception: If the token exchange fails
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                TOKEN_URL,
-                data={
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "code": code,
-                    "grant_type": "authorization_code",
-                },
-            )
+        data = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "code": code,
+            "grant_type": "authorization_code",
+        }
+
+        # Reuse the caller's client when given so the connection to Strava stays warm
+        if self.client is not None:
+            response = await self.client.post(TOKEN_URL, data=data)
+        else:
+            async with httpx.AsyncClient(verify=_SSL_CONTEXT) as client:
+                response = await client.post(TOKEN_URL, data=data)
 
-            if response.status_code != 200:
-                error_msg = f"Failed to exchange token: {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+        if response.status_code != 200:
+            logger.error("Failed to exchange token: %s", response.text[:200])
+            raise Exception(f"Failed to exchange token: {response.text}")
 
-            data = response.json()
-            token_data = TokenResponse(**data)
-            self.refresh_token = token_data.refresh_token
-            return token_data
+        token_data = TokenResponse(**response.json())
+        self.refresh_token = token_data.refresh_token
+        return token_data
 
-    def get_authorization_url(self):
+    def get_authorization_url(self, state: str | None = None):
         """Generate the authorization URL.
 
+        Args:
+            state: Optional state parameter that Strava echoes back to the callback
+
         Returns:
             The authorization URL to redirect the user to
         """
@@ -135,6 +194,8 @@ class StravaAuthenticator:
             "approval_prompt": "force",
             "scope": "read_all,activity:read,activity:read_all,profile:read_all",
         }
+        if state:
+            params["state"] = state
         return f"{AUTHORIZE_URL}?{urlencode(params)}"
 
     def setup_routes(self, app: FastAPI | None = None):
@@ -152,10 +213,10 @@ class StravaAuthenticator:
             raise ValueError("Provided app does not appear to be a valid FastAPI instance")
 
         # Add route for the token exchange
-        target_app.add_api_route(self.redirect_path, self.exchange_token, methods=["GET"])
+        target_app.add_api_route(self.redirect_path, self.exchange_token, methods=["GET"], include_in_schema=False)
 
         # Add route to start the auth flow
-        target_app.add_api_route("/auth", self.start_auth_flow, methods=["GET"])
+        target_app.add_api_route("/auth", self.start_auth_flow, methods=["GET"], include_in_schema=False)
 
     async def start_auth_flow(self):
         """Start the OAuth flow by redirecting to Strava.
@@ -164,7 +225,7 @@ class StravaAuthenticator:
             Redirect response to Strava authorization URL
         """
         auth_url = self.get_authorization_url()
-        logger.info(f"Starting auth flow with URL: {auth_url}")
+        logger.info("Starting auth flow with URL: %s", auth_url)
         return RedirectResponse(auth_url)
 
     async def get_refresh_token(self, open_browser: bool = True) -> str:
@@ -179,22 +240,29 @@ class StravaAuthenticator:
         Raises:
             Exception: If the authentication process fails
         """
-        # Create a future to wait for the token
-        self.token_future = asyncio.Future()
+        # Create a future to wait for the token, registered under a unique state
+        # so that concurrent flows each receive their own token
+        future = asyncio.get_running_loop().create_future()
+        state = secrets.token_urlsafe(16)
+        self._pending[state] = future
+        self.token_future = future
 
         # Open the browser for authorization if requested
-        auth_url = self.get_authorization_url()
+        auth_url = self.get_authorization_url(state=state)
         if open_browser:
-            logger.info(f"Opening browser to authorize: {auth_url}")
+            logger.info("Opening browser to authorize: %s", auth_url)
             browser_opened = webbrowser.open(auth_url)
             if not browser_opened:
                 logger.warning("Failed to open browser automatically. Please open the URL manually.")
-                logger.info(f"Authorization URL: {auth_url}")
+                logger.info("Authorization URL: %s", auth_url)
         else:
-            logger.info(f"Please open this URL to authorize: {auth_url}")
+            logger.info("Please open this URL to authorize: %s", auth_url)
 
         # Wait for the token
-        return await self.token_future
+        try:
+            return await future
+        finally:
+            self._pending.pop(state, None)
 
 
 async def get_strava_refresh_token(client_id: str, client_secret: str, app: FastAPI | None = None) -> str:
@@ -219,8 +287,6 @@ async def get_strava_refresh_token(client_id: str, client_secret: str, app: Fast
 
 if __name__ == "__main__":
     # This allows running this file directly to get a refresh token
-    import sys
-
     import uvicorn
 
     logging.basicConfig(level=logging.INFO)
@@ -239,7 +305,7 @@ if __name__ == "__main__":
         client_secret = sys.argv[2]
 
     # Create a FastAPI app for standalone operation
-    app = FastAPI(title="Strava Auth")
+    app = FastAPI(title="Strava Auth", openapi_url=None, docs_url=None, redoc_url=None)
     authenticator = StravaAuthenticator(client_id, client_secret, app)
     authenticator.setup_routes(app)
 
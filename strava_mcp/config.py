@@ -1,9 +1,15 @@
-from pydantic import Field, model_validator
+import functools
+
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class StravaSettings(BaseSettings):
-    """Strava API settings."""
+    """Strava API settings.
+
+    Any field not passed explicitly is read from the matching STRAVA_* environment
+    variable (e.g. STRAVA_CLIENT_ID) or the .env file.
+    """
 
     client_id: str = Field(..., description="Strava API client ID")
     client_secret: str = Field(..., description="Strava API client secret")
@@ -11,26 +17,30 @@ class StravaSettings(BaseSettings):
         default=None,
         description="Strava API refresh token (can be generated through auth flow)",
     )
-    base_url: str = Field("https://www.strava.com/api/v3", description="Strava API base URL")
-
-    model_config = SettingsConfigDict(env_prefix="STRAVA_", env_file=".env", env_file_encoding="utf-8")
-
-    @model_validator(mode="after")
-    def load_from_env(self):
-        """Load values from environment variables if not directly provided."""
-        import os
-
-        # Only override empty values with environment values
-        if not self.client_id and os.environ.get("STRAVA_CLIENT_ID"):
-            self.client_id = os.environ["STRAVA_CLIENT_ID"]
+    base_url: str = Field(default="https://www.strava.com/api/v3", description="Strava API base URL")
+    token_cache_path: str | None = Field(
+        default=None,
+        description="File to persist tokens in across restarts (disabled when unset)",
+    )
+    cache_ttl_seconds: float = Field(
+        default=300.0,
+        ge=0,
+        description="How long fetched activities are reused before asking Strava again (0 disables caching)",
+    )
+    skip_validation: bool = Field(
+        default=False,
+        description="Build models from Strava responses without validating them (faster, trusts the API)",
+    )
 
-        if not self.client_secret and os.environ.get("STRAVA_CLIENT_SECRET"):
-            self.client_secret = os.environ["STRAVA_CLIENT_SECRET"]
+    model_config = SettingsConfigDict(env_prefix="STRAVA_", env_file=".env", env_file_encoding="utf-8", frozen=True)
 
-        if not self.refresh_token and os.environ.get("STRAVA_REFRESH_TOKEN"):
-            self.refresh_token = os.environ["STRAVA_REFRESH_TOKEN"]
 
-        if not self.base_url and os.environ.get("STRAVA_BASE_URL"):
-            self.base_url = os.environ["STRAVA_BASE_URL"]
+@functools.lru_cache(maxsize=1)
+def get_settings() -> StravaSettings:
+    """Load the Strava settings from the environment, once per process.
 
-        return self
+    Returns:
+        The shared settings instance
+    """
+    # The required fields come from the STRAVA_* environment variables
+    return StravaSettings()  # type: ignore[call-arg]
@@ -1,14 +1,26 @@
+import importlib.util
 import logging
 
+import anyio
+
 from strava_mcp.server import mcp
 
 logger = logging.getLogger(__name__)
 
+# uvloop is an optional, faster event loop (not available on Windows)
+USE_UVLOOP = importlib.util.find_spec("uvloop") is not None
+
 
 def main():
     """Run the Strava MCP server."""
+    # Logging is configured here rather than in the library modules that get imported
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
     logger.info("Starting MCP server")
-    mcp.run(transport="stdio")
+    # Equivalent to mcp.run(transport="stdio"), but lets us pick the event loop
+    anyio.run(mcp.run_stdio_async, backend_options={"use_uvloop": USE_UVLOOP})
 
 
 if __name__ == "__main__":
@@ -1,11 +1,58 @@
+from collections.abc import Mapping
 from datetime import datetime
+from functools import cached_property
+from typing import Any, Self
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
+# The _from_strava constructors below skip validation. They are only for payloads
+# that come straight from the Strava API, which is trusted to match these schemas;
+# anything user-supplied (or the OAuth token exchange) must be validated.
 
-class Activity(BaseModel):
+
+def _parse_start_dates(data: dict[str, Any]) -> dict[str, datetime]:
+    """Parse the ISO 8601 start dates, so constructed models hold datetimes like validated ones."""
+    return {key: datetime.fromisoformat(data[key]) for key in ("start_date", "start_date_local") if key in data}
+
+
+class _JSONCachedModel(BaseModel):
+    """Base for the models returned by the MCP tools, which serialize each instance once."""
+
+    def to_json(self) -> str:
+        """Return the model as JSON.
+
+        The JSON is computed on first use and kept on the (frozen) instance.
+
+        Returns:
+            The model as a JSON string
+        """
+        return self._json
+
+    @cached_property
+    def _json(self) -> str:
+        return self.model_dump_json()
+
+    def model_copy(self, *, update: Mapping[str, Any] | None = None, deep: bool = False) -> Self:
+        """Copy the model, without the cached JSON, which would not match an updated copy.
+
+        Args:
+            update: Values to change in the copy
+            deep: Whether to make a deep copy
+
+        Returns:
+            The copied model
+        """
+        copied = super().model_copy(update=update, deep=deep)
+        vars(copied).pop("_json", None)
+        return copied
+
+
+class Activity(_JSONCachedModel):
     """Represents a Strava activity."""
 
+    # Strava payloads are read-only once parsed; nested models are reused rather than copied
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+
     id: int = Field(..., description="The unique identifier of the activity")
     name: str = Field(..., description="The name of the activity")
     distance: float = Field(..., description="The distance in meters")
@@ -22,7 +69,8 @@ class Activity(BaseModel):
     comment_count: int = Field(..., description="The number of comments")
     athlete_count: int = Field(..., description="The number of athletes")
     photo_count: int = Field(..., description="The number of photos")
-    map: dict | None = Field(None, description="The map of the activity")
+    # Nested Strava objects that are passed through untouched are typed Any so they aren't walked during validation
+    map: Any = Field(None, description="The map of the activity")
     trainer: bool = Field(..., description="Whether this activity was recorded on a training machine")
     commute: bool = Field(..., description="Whether this activity is a commute")
     manual: bool = Field(..., description="Whether this activity was created manually")
@@ -37,25 +85,39 @@ class Activity(BaseModel):
     elev_high: float | None = Field(None, description="The highest elevation")
     elev_low: float | None = Field(None, description="The lowest elevation")
 
+    @classmethod
+    def _from_strava(cls, data: dict[str, Any]) -> Self:
+        """Build the model from a trusted Strava payload without validating it.
+
+        Args:
+            data: The decoded JSON object returned by Strava
+
+        Returns:
+            The constructed model
+        """
+        return cls.model_construct(**{**data, **_parse_start_dates(data)})
+
 
 class DetailedActivity(Activity):
     """Detailed version of a Strava activity."""
 
     description: str | None = Field(None, description="The description of the activity")
-    athlete: dict = Field(..., description="The athlete who performed the activity")
+    athlete: Any = Field(..., description="The athlete who performed the activity")
     calories: float | None = Field(None, description="Calories burned during activity")
-    segment_efforts: list[dict] | None = Field(None, description="List of segment efforts")
-    splits_metric: list[dict] | None = Field(None, description="Splits in metric units")
-    splits_standard: list[dict] | None = Field(None, description="Splits in standard units")
-    best_efforts: list[dict] | None = Field(None, description="List of best efforts")
-    photos: dict | None = Field(None, description="Photos associated with activity")
-    gear: dict | None = Field(None, description="Gear used during activity")
+    segment_efforts: Any = Field(None, description="List of segment efforts")
+    splits_metric: Any = Field(None, description="Splits in metric units")
+    splits_standard: Any = Field(None, description="Splits in standard units")
+    best_efforts: Any = Field(None, description="List of best efforts")
+    photos: Any = Field(None, description="Photos associated with activity")
+    gear: Any = Field(None, description="Gear used during activity")
     device_name: str | None = Field(None, description="Name of device used to record activity")
 
 
 class Segment(BaseModel):
     """Represents a Strava segment."""
 
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+
     id: int = Field(..., description="The unique identifier of the segment")
     name: str = Field(..., description="The name of the segment")
     activity_type: str = Field(..., description="The activity type of the segment")
@@ -74,10 +136,24 @@ class Segment(BaseModel):
     private: bool = Field(..., description="Whether this segment is private")
     starred: bool = Field(..., description="Whether this segment is starred by the authenticated athlete")
 
+    @classmethod
+    def _from_strava(cls, data: dict[str, Any]) -> Self:
+        """Build the model from a trusted Strava payload without validating it.
+
+        Args:
+            data: The decoded JSON object returned by Strava
+
+        Returns:
+            The constructed model
+        """
+        return cls.model_construct(**data)
+
 
-class SegmentEffort(BaseModel):
+class SegmentEffort(_JSONCachedModel):
     """Represents a Strava segment effort."""
 
+    model_config = ConfigDict(frozen=True, revalidate_instances="never")
+
     id: int = Field(..., description="The unique identifier of the segment effort")
     activity_id: int = Field(..., description="The ID of the associated activity")
     segment_id: int = Field(..., description="The ID of the associated segment")
@@ -92,13 +168,32 @@ class SegmentEffort(BaseModel):
     average_heartrate: float | None = Field(None, description="Average heartrate")
     max_heartrate: float | None = Field(None, description="Maximum heartrate")
     pr_rank: int | None = Field(None, description="Personal record rank (1-3), 0 if not a PR")
-    achievements: list[dict] | None = Field(None, description="List of achievements")
-    athlete: dict = Field(..., description="The athlete who performed the effort")
+    achievements: Any = Field(None, description="List of achievements")
+    athlete: Any = Field(..., description="The athlete who performed the effort")
     segment: Segment = Field(..., description="The segment")
 
+    @classmethod
+    def _from_strava(cls, data: dict[str, Any]) -> Self:
+        """Build the model from a trusted Strava payload without validating it.
+
+        Args:
+            data: The decoded JSON object returned by Strava
+
+        Returns:
+            The constructed model, with the nested segment constructed as well
+        """
+        return cls.model_construct(
+            **{**data, **_parse_start_dates(data), "segment": Segment._from_strava(data["segment"])}
+        )
+
 
 class ErrorResponse(BaseModel):
     """Represents an error response from the Strava API."""
 
     message: str = Field(..., description="Error message")
     code: int = Field(..., description="Error code")
+
+
+# Validators for list responses, built once at import so each page is validated in a single pydantic-core call
+ACTIVITY_LIST_ADAPTER = TypeAdapter(list[Activity])
+SEGMENT_EFFORT_LIST_ADAPTER = TypeAdapter(list[SegmentEffort])
@@ -3,19 +3,16 @@
 import asyncio
 import logging
 import os
+import sys
 import webbrowser
 from contextlib import asynccontextmanager
 
+import httpx
 import uvicorn
 from fastapi import FastAPI
 
 from strava_mcp.auth import REDIRECT_HOST, REDIRECT_PORT, StravaAuthenticator
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
 
@@ -44,13 +41,19 @@ class StravaOAuthServer:
         self.authenticator = None
         self.app = None
         self.server_thread = None
-        self.token_future = asyncio.Future()
+        # Created in _initialize_server so it belongs to the loop that runs the flow
+        self.token_future: asyncio.Future[str] | None = None
         self.server_task = None
         self.server = None
+        # HTTP client for the token exchange, kept open for the lifetime of the server
+        self.http_client: httpx.AsyncClient | None = None
 
-    async def get_token(self) -> str:
+    async def get_token(self, open_browser: bool = True) -> str:
         """Get a refresh token by starting the OAuth flow.
 
+        Args:
+            open_browser: Whether to automatically open the browser
+
         Returns:
             The refresh token
 
@@ -61,12 +64,17 @@ class StravaOAuthServer:
         if not self.app:
             await self._initialize_server()
 
-        # Open browser to start authorization
-        if self.authenticator is None:
+        # Open browser to start authorization, unless the flow is already settled
+        # (e.g. the callback server failed to start)
+        if self.authenticator is None or self.token_future is None:
             raise Exception("Authenticator not initialized")
-        auth_url = self.authenticator.get_authorization_url()
-        logger.info(f"Opening browser to authorize with Strava: {auth_url}")
-        webbrowser.open(auth_url)
+        if not self.token_future.done():
+            auth_url = self.authenticator.get_authorization_url()
+            if open_browser:
+                logger.info("Opening browser to authorize with Strava: %s", auth_url)
+                webbrowser.open(auth_url)
+            else:
+                logger.info("Open this URL to authorize with Strava: %s", auth_url)
 
         # Wait for the token
         try:
@@ -92,23 +100,30 @@ class StravaOAuthServer:
             # Cleanup resources if needed
             logger.info("OAuth server shutting down")
 
-        # Create FastAPI app
+        # Create FastAPI app. It only serves the one-shot OAuth callback, so skip
+        # building the OpenAPI schema and docs routes.
         self.app = FastAPI(
             title="Strava OAuth",
             description="OAuth server for Strava authentication",
             lifespan=lifespan,
+            openapi_url=None,
+            docs_url=None,
+            redoc_url=None,
         )
 
         # Initialize authenticator
+        self.http_client = httpx.AsyncClient()
         self.authenticator = StravaAuthenticator(
             client_id=self.client_id,
             client_secret=self.client_secret,
             app=self.app,
             host=self.host,
             port=self.port,
+            client=self.http_client,
         )
 
         # Store our token future in the authenticator
+        self.token_future = asyncio.get_running_loop().create_future()
         self.authenticator.token_future = self.token_future
 
         # Set up routes
@@ -117,8 +132,10 @@ class StravaOAuthServer:
         # Start server in a separate task
         self.server_task = asyncio.create_task(self._run_server())
 
-        # Wait a moment for the server to start
-        await asyncio.sleep(0.5)
+        # Wait until uvicorn is accepting connections (or has failed to start) instead of
+        # sleeping for a fixed time
+        while not (self.server and self.server.started) and not self.server_task.done():
+            await asyncio.sleep(0.01)
 
     async def _run_server(self):
         """Run the uvicorn server."""
@@ -139,11 +156,11 @@ class StravaOAuthServer:
             await self.server.serve()
         except Exception as e:
             logger.exception("Error running OAuth server")
-            if not self.token_future.done():
+            if self.token_future and not self.token_future.done():
                 self.token_future.set_exception(e)
 
     async def _stop_server(self):
-        """Stop the uvicorn server."""
+        """Stop the uvicorn server and close its HTTP client."""
         if self.server:
             self.server.should_exit = True
             if self.server_task:
@@ -152,10 +169,17 @@ class StravaOAuthServer:
                 except TimeoutError:
                     logger.warning("Server shutdown timed out")
 
+        if self.http_client:
+            await self.http_client.aclose()
+            self.http_client = None
+
 
 async def get_refresh_token_from_oauth(client_id: str, client_secret: str) -> str:
     """Get a refresh token by starting a standalone OAuth server.
 
+    The browser is not opened when STRAVA_OAUTH_NO_BROWSER is set, e.g. on a headless
+    machine; the authorization URL is logged instead.
+
     Args:
         client_id: Strava API client ID
         client_secret: Strava API client secret
@@ -167,12 +191,15 @@ async def get_refresh_token_from_oauth(client_id: str, client_secret: str) -> st
         Exception: If the OAuth flow fails
     """
     server = StravaOAuthServer(client_id, client_secret)
-    return await server.get_token()
+    return await server.get_token(open_browser=not os.environ.get("STRAVA_OAUTH_NO_BROWSER"))
 
 
 if __name__ == "__main__":
     # This allows running this file directly to get a refresh token
-    import sys
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
 
     # Check if client_id and client_secret are provided as env vars
     client_id = os.environ.get("STRAVA_CLIENT_ID")
@@ -193,6 +220,8 @@ if __name__ == "__main__":
         sys.exit(1)
 
     async def main():
+        # Tasks that finish without suspending complete immediately, as in the MCP server
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
         try:
             # We've verified these aren't None above
             assert client_id is not None and client_secret is not None
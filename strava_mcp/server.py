@@ -1,68 +1,158 @@
+import asyncio
+import functools
 import logging
-from collections.abc import AsyncIterator
+import weakref
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
 from typing import Any, cast
 
 from fastapi import FastAPI
 from mcp.server.fastmcp import Context, FastMCP
 
-from strava_mcp.config import StravaSettings
+from strava_mcp.config import get_settings
 from strava_mcp.service import StravaService
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger(__name__)
 
 
+class _SharedService:
+    """The Strava service shared by the sessions running on one event loop."""
+
+    def __init__(self):
+        self.service: StravaService | None = None
+        self.users = 0
+        self.lock = asyncio.Lock()
+
+
+# The service's connection pools and the lock guarding it belong to the event loop that
+# created them, so each loop gets its own shared service
+_shared_services: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _SharedService] = weakref.WeakKeyDictionary()
+
+
+def _get_shared_service() -> _SharedService:
+    """Return the shared service state of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    shared = _shared_services.get(loop)
+    if shared is None:
+        shared = _shared_services[loop] = _SharedService()
+    return shared
+
+
+async def _acquire_service(server: FastMCP) -> StravaService:
+    """Return the shared Strava service, creating it for the first session.
+
+    Args:
+        server: The FastMCP server instance
+
+    Returns:
+        The shared Strava service
+    """
+    shared = _get_shared_service()
+
+    async with shared.lock:
+        if shared.service is None:
+            # Load settings from environment variables
+            try:
+                # Settings are read from STRAVA_* env vars once and reused
+                settings = get_settings()
+
+                if not settings.client_id:
+                    raise ValueError("STRAVA_CLIENT_ID environment variable is not set")
+                if not settings.client_secret:
+                    raise ValueError("STRAVA_CLIENT_SECRET environment variable is not set")
+
+                logger.info("Loaded Strava API settings")
+            except Exception as e:
+                logger.error("Failed to load Strava API settings: %s", e)
+                raise
+
+            # FastMCP extends FastAPI, so we can safely cast it for type checking
+            fastapi_app = cast(FastAPI, server)
+
+            # Initialize the Strava service with the FastAPI app
+            service = StravaService(settings, fastapi_app)
+            logger.info("Initialized Strava service")
+
+            # Set up authentication routes and initialize
+            await service.initialize()
+            logger.info("Service initialization completed")
+            shared.service = service
+
+        shared.users += 1
+        return shared.service
+
+
+async def _release_service():
+    """Drop a session's reference to the shared service, closing it after the last one."""
+    shared = _get_shared_service()
+
+    async with shared.lock:
+        shared.users -= 1
+        if shared.users == 0 and shared.service is not None:
+            # Clean up resources
+            await shared.service.close()
+            shared.service = None
+            logger.info("Closed Strava service")
+
+
 @asynccontextmanager
 async def lifespan(server: FastMCP) -> AsyncIterator[dict[str, Any]]:
     """Set up and tear down the Strava service for the MCP server.
 
+    Concurrent sessions share one service, so they reuse its pooled connections
+    instead of each opening their own.
+
     Args:
         server: The FastMCP server instance
 
     Yields:
         The lifespan context containing the Strava service
     """
-    # Load settings from environment variables
-    try:
-        # Let StravaSettings load values directly from env vars
-        settings = StravaSettings(
-            client_id="",  # Will be loaded from environment variables
-            client_secret="",  # Will be loaded from environment variables
-            base_url="https://www.strava.com/api/v3",  # Default value
-        )
-
-        if not settings.client_id:
-            raise ValueError("STRAVA_CLIENT_ID environment variable is not set")
-        if not settings.client_secret:
-            raise ValueError("STRAVA_CLIENT_SECRET environment variable is not set")
-
-        logger.info("Loaded Strava API settings")
-    except Exception as e:
-        logger.error(f"Failed to load Strava API settings: {str(e)}")
-        raise
-
-    # FastMCP extends FastAPI, so we can safely cast it for type checking
-    fastapi_app = cast(FastAPI, server)
-
-    # Initialize the Strava service with the FastAPI app
-    service = StravaService(settings, fastapi_app)
-    logger.info("Initialized Strava service")
-
-    # Set up authentication routes and initialize
-    await service.initialize()
-    logger.info("Service initialization completed")
-
+    service = await _acquire_service(server)
     try:
         yield {"service": service}
     finally:
-        # Clean up resources
-        await service.close()
-        logger.info("Closed Strava service")
+        await _release_service()
+
+
+def _get_service(ctx: Context) -> StravaService:
+    """Return the Strava service from the request's lifespan context.
+
+    Args:
+        ctx: The MCP request context
+
+    Returns:
+        The Strava service
+
+    Raises:
+        ValueError: If the lifespan context does not hold a service
+    """
+    context = ctx.request_context.lifespan_context
+    service = context.get("service") if context else None
+    if service is None:
+        raise ValueError("Service not available in context")
+    return service
+
+
+def _log_errors[**P, R](fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Log any exception raised by a tool before re-raising it.
+
+    Args:
+        fn: The tool function to wrap
+
+    Returns:
+        The wrapped tool function, with the original signature for FastMCP
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            logger.error("Error in %s tool: %s", fn.__name__, e)
+            raise
+
+    return wrapper
 
 
 # Create the MCP server
@@ -77,13 +167,14 @@ mcp = FastMCP(
 
 
 @mcp.tool()
+@_log_errors
 async def get_user_activities(
     ctx: Context,
     before: int | None = None,
     after: int | None = None,
     page: int = 1,
     per_page: int = 30,
-) -> list[dict]:
+) -> list[str]:
     """Get the authenticated user's activities.
 
     Args:
@@ -94,31 +185,52 @@ async def get_user_activities(
         per_page: Number of items per page
 
     Returns:
-        List of activities
+        List of activities, each as a JSON object
     """
-    try:
-        # Safely access service from context
-        if not ctx.request_context.lifespan_context:
-            raise ValueError("Lifespan context not available")
+    service = _get_service(ctx)
 
-        # Cast service to StravaService to satisfy type checker
-        service = cast(StravaService, ctx.request_context.lifespan_context.get("service"))
-        if not service:
-            raise ValueError("Service not available in context")
+    # Serialize each model straight to JSON in pydantic-core; FastMCP passes strings
+    # through as text content, skipping its to_jsonable_python + json.dumps round trip.
+    # The JSON is kept on the model so cached activities are only serialized once.
+    activities = await service.get_activities(before, after, page, per_page)
+    return [activity.to_json() for activity in activities]
 
-        activities = await service.get_activities(before, after, page, per_page)
-        return [activity.model_dump() for activity in activities]
-    except Exception as e:
-        logger.error(f"Error in get_user_activities tool: {str(e)}")
-        raise
+
+@mcp.tool()
+@_log_errors
+async def get_user_activities_bulk(
+    ctx: Context,
+    before: int | None = None,
+    after: int | None = None,
+    start_page: int = 1,
+    end_page: int = 5,
+    per_page: int = 30,
+) -> list[str]:
+    """Get several pages of the authenticated user's activities in one call.
+
+    Args:
+        ctx: The MCP request context
+        before: An epoch timestamp for filtering activities before a certain time
+        after: An epoch timestamp for filtering activities after a certain time
+        start_page: First page number to fetch
+        end_page: Last page number to fetch (inclusive); at most 10 pages are fetched per call
+        per_page: Number of items per page
+
+    Returns:
+        List of activities from all pages, each as a JSON object
+    """
+    service = _get_service(ctx)
+    activities = await service.get_activities_bulk(before, after, start_page, end_page, per_page)
+    return [activity.to_json() for activity in activities]
 
 
 @mcp.tool()
+@_log_errors
 async def get_activity(
     ctx: Context,
     activity_id: int,
     include_all_efforts: bool = False,
-) -> dict:
+) -> str:
     """Get details of a specific activity.
 
     Args:
@@ -127,30 +239,19 @@ async def get_activity(
         include_all_efforts: Whether to include all segment efforts
 
     Returns:
-        The activity details
+        The activity details as a JSON object
     """
-    try:
-        # Safely access service from context
-        if not ctx.request_context.lifespan_context:
-            raise ValueError("Lifespan context not available")
-
-        # Cast service to StravaService to satisfy type checker
-        service = cast(StravaService, ctx.request_context.lifespan_context.get("service"))
-        if not service:
-            raise ValueError("Service not available in context")
-
-        activity = await service.get_activity(activity_id, include_all_efforts)
-        return activity.model_dump()
-    except Exception as e:
-        logger.error(f"Error in get_activity tool: {str(e)}")
-        raise
+    service = _get_service(ctx)
+    activity = await service.get_activity(activity_id, include_all_efforts)
+    return activity.to_json()
 
 
 @mcp.tool()
+@_log_errors
 async def get_activity_segments(
     ctx: Context,
     activity_id: int,
-) -> list[dict]:
+) -> list[str]:
     """Get the segments of a specific activity.
 
     Args:
@@ -158,20 +259,8 @@ async def get_activity_segments(
         activity_id: The ID of the activity
 
     Returns:
-        List of segment efforts for the activity
+        List of segment efforts for the activity, each as a JSON object
     """
-    try:
-        # Safely access service from context
-        if not ctx.request_context.lifespan_context:
-            raise ValueError("Lifespan context not available")
-
-        # Cast service to StravaService to satisfy type checker
-        service = cast(StravaService, ctx.request_context.lifespan_context.get("service"))
-        if not service:
-            raise ValueError("Service not available in context")
-
-        segments = await service.get_activity_segments(activity_id)
-        return [segment.model_dump() for segment in segments]
-    except Exception as e:
-        logger.error(f"Error in get_activity_segments tool: {str(e)}")
-        raise
+    service = _get_service(ctx)
+    segments = await service.get_activity_segments(activity_id)
+    return [segment.to_json() for segment in segments]
@@ -10,7 +10,11 @@ logger = logging.getLogger(__name__)
 
 
 class StravaService:
-    """Service for interacting with the Strava API."""
+    """Service for interacting with the Strava API.
+
+    The data methods delegate straight to StravaAPI; errors are logged once by the
+    MCP tools that call them.
+    """
 
     def __init__(self, settings: StravaSettings, app: FastAPI | None = None):
         """Initialize the Strava service.
@@ -25,7 +29,7 @@ class StravaService:
     async def initialize(self):
         """Initialize the service."""
         # Log info about OAuth flow if no refresh token
-        if not self.settings.refresh_token:
+        if not self.api.refresh_token:
             logger.info(
                 "No STRAVA_REFRESH_TOKEN found in environment. "
                 "The standalone OAuth flow will be triggered automatically when needed."
@@ -53,14 +57,32 @@ class StravaService:
         Returns:
             List of activities
         """
-        try:
-            logger.info("Getting activities for authenticated athlete")
-            activities = await self.api.get_activities(before, after, page, per_page)
-            logger.info(f"Retrieved {len(activities)} activities")
-            return activities
-        except Exception as e:
-            logger.error(f"Error getting activities: {str(e)}")
-            raise
+        return await self.api.get_activities(before, after, page, per_page)
+
+    async def get_activities_bulk(
+        self,
+        before: int | None = None,
+        after: int | None = None,
+        start_page: int = 1,
+        end_page: int = 5,
+        per_page: int = 30,
+    ) -> list[Activity]:
+        """Get a range of activity pages for the authenticated athlete, fetched concurrently.
+
+        Args:
+            before: An epoch timestamp for filtering activities before a certain time
+            after: An epoch timestamp for filtering activities after a certain time
+            start_page: First page number to fetch
+            end_page: Last page number to fetch (inclusive)
+            per_page: Number of items per page
+
+        Returns:
+            List of activities from all pages, in page order
+
+        Raises:
+            ValueError: If the page range is inverted or too wide
+        """
+        return await self.api.get_activity_pages(before, after, start_page, end_page, per_page)
 
     async def get_activity(self, activity_id: int, include_all_efforts: bool = False) -> DetailedActivity:
         """Get a specific activity.
@@ -72,14 +94,7 @@ class StravaService:
         Returns:
             The activity details
         """
-        try:
-            logger.info(f"Getting activity {activity_id}")
-            activity = await self.api.get_activity(activity_id, include_all_efforts)
-            logger.info(f"Retrieved activity: {activity.name}")
-            return activity
-        except Exception as e:
-            logger.error(f"Error getting activity {activity_id}: {str(e)}")
-            raise
+        return await self.api.get_activity(activity_id, include_all_efforts)
 
     async def get_activity_segments(self, activity_id: int) -> list[SegmentEffort]:
         """Get segments from a specific activity.
@@ -90,11 +105,4 @@ class StravaService:
         Returns:
             List of segment efforts for the activity
         """
-        try:
-            logger.info(f"Getting segments for activity {activity_id}")
-            segments = await self.api.get_activity_segments(activity_id)
-            logger.info(f"Retrieved {len(segments)} segments")
-            return segments
-        except Exception as e:
-            logger.error(f"Error getting segments for activity {activity_id}: {str(e)}")
-            raise
+        return await self.api.get_activity_segments(activity_id)
@@ -0,0 +1,141 @@
+"""Shared fixtures for the Strava MCP tests."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from strava_mcp.models import Activity, DetailedActivity, Segment, SegmentEffort
+
+# The models are frozen, so one instance of each can safely be shared by every test
+
+START_DATE = datetime(2023, 1, 1, 10, 0, tzinfo=UTC)
+EFFORT_START_DATE = datetime(2023, 1, 1, 10, 5, tzinfo=UTC)
+
+
+@pytest.fixture(scope="session")
+def sample_activity():
+    """Fixture with an activity as returned by the service."""
+    return Activity(
+        id=1234567890,
+        name="Morning Run",
+        distance=5000,
+        moving_time=1200,
+        elapsed_time=1300,
+        total_elevation_gain=50,
+        type="Run",
+        sport_type="Run",
+        start_date=START_DATE,
+        start_date_local=START_DATE,
+        timezone="Europe/London",
+        achievement_count=2,
+        kudos_count=5,
+        comment_count=0,
+        athlete_count=1,
+        photo_count=0,
+        trainer=False,
+        commute=False,
+        manual=False,
+        private=False,
+        flagged=False,
+        average_speed=4.167,
+        max_speed=5.3,
+        has_heartrate=True,
+        average_heartrate=140,
+        max_heartrate=160,
+        # Add required fields with default values
+        map=None,
+        workout_type=None,
+        elev_high=None,
+        elev_low=None,
+    )
+
+
+@pytest.fixture(scope="session")
+def sample_detailed_activity():
+    """Fixture with a detailed activity as returned by the service."""
+    return DetailedActivity(
+        id=1234567890,
+        name="Morning Run",
+        distance=5000,
+        moving_time=1200,
+        elapsed_time=1300,
+        total_elevation_gain=50,
+        type="Run",
+        sport_type="Run",
+        start_date=START_DATE,
+        start_date_local=START_DATE,
+        timezone="Europe/London",
+        achievement_count=2,
+        kudos_count=5,
+        comment_count=0,
+        athlete_count=1,
+        photo_count=0,
+        trainer=False,
+        commute=False,
+        manual=False,
+        private=False,
+        flagged=False,
+        average_speed=4.167,
+        max_speed=5.3,
+        has_heartrate=True,
+        average_heartrate=140,
+        max_heartrate=160,
+        athlete={"id": 123},
+        description="Test description",
+        # Add required fields with default values
+        map=None,
+        workout_type=None,
+        elev_high=None,
+        elev_low=None,
+        calories=None,
+        segment_efforts=None,
+        splits_metric=None,
+        splits_standard=None,
+        best_efforts=None,
+        photos=None,
+        gear=None,
+        device_name=None,
+    )
+
+
+@pytest.fixture(scope="session")
+def sample_segment_effort():
+    """Fixture with a segment effort as returned by the service."""
+    return SegmentEffort(
+        id=67890,
+        activity_id=1234567890,
+        segment_id=12345,
+        name="Test Segment",
+        elapsed_time=180,
+        moving_time=180,
+        start_date=EFFORT_START_DATE,
+        start_date_local=EFFORT_START_DATE,
+        distance=1000,
+        athlete={"id": 123},
+        segment=Segment(
+            id=12345,
+            name="Test Segment",
+            activity_type="Run",
+            distance=1000,
+            average_grade=5.0,
+            maximum_grade=10.0,
+            elevation_high=200,
+            elevation_low=150,
+            total_elevation_gain=50,
+            start_latlng=[51.5, -0.1],
+            end_latlng=[51.5, -0.2],
+            climb_category=0,
+            private=False,
+            starred=False,
+            city=None,
+            state=None,
+            country=None,
+        ),
+        # Add required fields with default values
+        average_watts=None,
+        device_watts=None,
+        average_heartrate=None,
+        max_heartrate=None,
+        pr_rank=None,
+        achievements=None,
+    )
@@ -1,3 +1,6 @@
+import asyncio
+import json
+import time
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -5,7 +8,38 @@ import pytest
 
 from strava_mcp.api import StravaAPI
 from strava_mcp.config import StravaSettings
-from strava_mcp.models import Activity, DetailedActivity
+from strava_mcp.models import Activity, DetailedActivity, SegmentEffort
+
+# Activity payloads as returned by /athlete/activities and /activities/{id}
+ACTIVITY_DATA = {
+    "id": 1234567890,
+    "name": "Morning Run",
+    "distance": 5000,
+    "moving_time": 1200,
+    "elapsed_time": 1300,
+    "total_elevation_gain": 50,
+    "type": "Run",
+    "sport_type": "Run",
+    "start_date": "2023-01-01T10:00:00Z",
+    "start_date_local": "2023-01-01T10:00:00Z",
+    "timezone": "Europe/London",
+    "achievement_count": 2,
+    "kudos_count": 5,
+    "comment_count": 0,
+    "athlete_count": 1,
+    "photo_count": 0,
+    "trainer": False,
+    "commute": False,
+    "manual": False,
+    "private": False,
+    "flagged": False,
+    "average_speed": 4.167,
+    "max_speed": 5.3,
+    "has_heartrate": True,
+    "average_heartrate": 140,
+    "max_heartrate": 160,
+}
+DETAILED_ACTIVITY_DATA = {**ACTIVITY_DATA, "athlete": {"id": 123}, "description": "Test description"}
 
 
 @pytest.fixture
@@ -22,7 +56,8 @@ def settings():
 def mock_response():
     mock = MagicMock()
     mock.is_success = True
-    mock.json = MagicMock(return_value={})
+    mock.content = b"{}"
+    mock.headers = {}
     mock.status_code = 200
     return mock
 
@@ -36,77 +71,141 @@ def api(settings):
     return api
 
 
-@pytest.mark.asyncio
 async def test_ensure_token_valid(api):
     # Token is already valid
     token = await api._ensure_token()
     assert token == "test_access_token"
 
 
-@pytest.mark.asyncio
 async def test_ensure_token_refresh(settings):
-    with patch("httpx.AsyncClient") as mock_client:
-        # Setup mock for token refresh
-        mock_instance = mock_client.return_value.__aenter__.return_value
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "access_token": "new_access_token",
-            "expires_at": datetime.now().timestamp() + 3600,
-        }
-        mock_instance.post.return_value = mock_response
-
-        # Create API with expired token
-        api = StravaAPI(settings)
-        api.access_token = "old_access_token"
-        api.token_expires_at = datetime.now().timestamp() - 3600
-
-        # Test token refresh
-        token = await api._ensure_token()
-        assert token == "new_access_token"
-
-        # Verify correct API call was made
-        mock_instance.post.assert_called_once()
-        args, kwargs = mock_instance.post.call_args
-        assert args[0] == "https://www.strava.com/oauth/token"
-        assert kwargs["json"]["client_id"] == "test_client_id"
-        assert kwargs["json"]["client_secret"] == "test_client_secret"
-        assert kwargs["json"]["refresh_token"] == "test_refresh_token"
-        assert kwargs["json"]["grant_type"] == "refresh_token"
-
-
-@pytest.mark.asyncio
+    # Setup mock for token refresh
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "access_token": "new_access_token",
+        "expires_at": datetime.now().timestamp() + 3600,
+    }
+
+    # Create API with expired token
+    api = StravaAPI(settings)
+    api._oauth_client = AsyncMock()
+    api._oauth_client.post.return_value = mock_response
+    api.access_token = "old_access_token"
+    api.token_expires_at = datetime.now().timestamp() - 3600
+
+    # Test token refresh
+    token = await api._ensure_token()
+    assert token == "new_access_token"
+
+    # Verify correct API call was made
+    api._oauth_client.post.assert_called_once()
+    args, kwargs = api._oauth_client.post.call_args
+    assert args[0] == "/oauth/token"
+    assert kwargs["data"]["client_id"] == "test_client_id"
+    assert kwargs["data"]["client_secret"] == "test_client_secret"
+    assert kwargs["data"]["refresh_token"] == "test_refresh_token"
+    assert kwargs["data"]["grant_type"] == "refresh_token"
+
+
+async def test_ensure_token_refreshes_before_expiry(api):
+    # A token about to expire should be refreshed proactively
+    api.token_expires_at = datetime.now().timestamp() + 30
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "access_token": "new_access_token",
+        "expires_at": int(datetime.now().timestamp()) + 3600,
+    }
+    api._oauth_client = AsyncMock()
+    api._oauth_client.post.return_value = mock_response
+
+    token = await api._ensure_token()
+
+    assert token == "new_access_token"
+    assert isinstance(api.token_expires_at, float)
+
+
+async def test_ensure_token_concurrent_refresh(settings):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "access_token": "new_access_token",
+        "expires_at": datetime.now().timestamp() + 3600,
+    }
+
+    api = StravaAPI(settings)
+    api._oauth_client = AsyncMock()
+    api._oauth_client.post.return_value = mock_response
+
+    # Concurrent callers with no valid token should trigger a single refresh
+    tokens = await asyncio.gather(*(api._ensure_token() for _ in range(5)))
+
+    assert tokens == ["new_access_token"] * 5
+    api._oauth_client.post.assert_called_once()
+
+
+async def test_ensure_token_refresh_survives_cancelled_caller(settings):
+    refresh_started = asyncio.Event()
+    release = asyncio.Event()
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "access_token": "new_access_token",
+        "expires_at": datetime.now().timestamp() + 3600,
+    }
+
+    async def slow_post(*args, **kwargs):
+        refresh_started.set()
+        await release.wait()
+        return mock_response
+
+    api = StravaAPI(settings)
+    api._oauth_client = AsyncMock()
+    api._oauth_client.post.side_effect = slow_post
+
+    first = asyncio.create_task(api._ensure_token())
+    await refresh_started.wait()
+    second = asyncio.create_task(api._ensure_token())
+    await asyncio.sleep(0)
+
+    # Cancelling the caller that started the refresh must not abort it for the other
+    first.cancel()
+    release.set()
+
+    assert await second == "new_access_token"
+    api._oauth_client.post.assert_called_once()
+
+
+async def test_token_cache_round_trip(settings, tmp_path):
+    cache_path = tmp_path / "token.json"
+    settings = settings.model_copy(update={"token_cache_path": str(cache_path)})
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "access_token": "new_access_token",
+        "refresh_token": "rotated_refresh_token",
+        "expires_at": datetime.now().timestamp() + 3600,
+    }
+
+    api = StravaAPI(settings)
+    api._oauth_client = AsyncMock()
+    api._oauth_client.post.return_value = mock_response
+    await api._ensure_token()
+
+    assert cache_path.stat().st_mode & 0o777 == 0o600
+
+    # A new client picks up the cached tokens without refreshing
+    restarted = StravaAPI(settings)
+    restarted._oauth_client = AsyncMock()
+
+    assert await restarted._ensure_token() == "new_access_token"
+    assert restarted.refresh_token == "rotated_refresh_token"
+    restarted._oauth_client.post.assert_not_called()
+
+
 async def test_get_activities(api, mock_response):
     # Setup mock response
-    activity_data = {
-        "id": 1234567890,
-        "name": "Morning Run",
-        "distance": 5000,
-        "moving_time": 1200,
-        "elapsed_time": 1300,
-        "total_elevation_gain": 50,
-        "type": "Run",
-        "sport_type": "Run",
-        "start_date": "2023-01-01T10:00:00Z",
-        "start_date_local": "2023-01-01T10:00:00Z",
-        "timezone": "Europe/London",
-        "achievement_count": 2,
-        "kudos_count": 5,
-        "comment_count": 0,
-        "athlete_count": 1,
-        "photo_count": 0,
-        "trainer": False,
-        "commute": False,
-        "manual": False,
-        "private": False,
-        "flagged": False,
-        "average_speed": 4.167,
-        "max_speed": 5.3,
-        "has_heartrate": True,
-        "average_heartrate": 140,
-        "max_heartrate": 160,
-    }
-    mock_response.json.return_value = [activity_data]
+    mock_response.content = json.dumps([ACTIVITY_DATA]).encode()
     api._client.request.return_value = mock_response
 
     # Test get_activities
@@ -118,48 +217,77 @@ async def test_get_activities(api, mock_response):
     assert args[0] == "GET"
     assert args[1] == "/athlete/activities"
     assert kwargs["params"] == {"page": 1, "per_page": 30}
+    assert kwargs["headers"] == {"Authorization": "Bearer test_access_token"}
 
     # Verify response
     assert len(activities) == 1
     assert isinstance(activities[0], Activity)
-    assert activities[0].id == activity_data["id"]
-    assert activities[0].name == activity_data["name"]
+    assert activities[0].id == ACTIVITY_DATA["id"]
+    assert activities[0].name == ACTIVITY_DATA["name"]
+
+
+async def test_get_activities_skip_validation(api, mock_response):
+    api.settings = api.settings.model_copy(update={"skip_validation": True})
+    mock_response.content = json.dumps(
+        [{"id": 1234567890, "name": "Morning Run", "start_date": "2023-01-01T10:00:00Z", "unknown": 1}]
+    ).encode()
+    api._client.request.return_value = mock_response
+
+    # The payload is trusted, so incomplete objects are constructed as-is
+    activities = await api.get_activities()
+
+    assert isinstance(activities[0], Activity)
+    assert activities[0].id == 1234567890
+    assert activities[0].start_date == datetime.fromisoformat("2023-01-01T10:00:00Z")
+    assert not hasattr(activities[0], "unknown")
+
+
+async def test_get_activity_pages(api):
+    # Pages 2-3 are full, page 4 is short; page 5 is fetched in the same batch but ignored
+    pages = {2: [1, 2], 3: [3, 4], 4: [5], 5: []}
+
+    async def get_activities(before, after, page, per_page):
+        return list(pages[page])
+
+    api.get_activities = AsyncMock(side_effect=get_activities)
+
+    activities = await api.get_activity_pages(start_page=2, end_page=9, per_page=2, max_concurrency=2)
+
+    assert activities == [1, 2, 3, 4, 5]
+    assert [call.args[2] for call in api.get_activities.call_args_list] == [2, 3, 4, 5]
+
+
+async def test_get_activity_pages_stops_at_end_page(api):
+    api.get_activities = AsyncMock(return_value=[1, 2])
+
+    activities = await api.get_activity_pages(start_page=1, end_page=3, per_page=2, max_concurrency=2)
+
+    assert activities == [1, 2] * 3
+    assert [call.args[2] for call in api.get_activities.call_args_list] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"start_page": 3, "end_page": 2}, "end_page must not be before start_page"),
+        ({"start_page": 0}, "start_page must be at least 1"),
+        ({"start_page": 1, "end_page": 10000}, "At most 10 pages"),
+        ({"per_page": 0}, "per_page must be at least 1"),
+        ({"max_concurrency": 0}, "max_concurrency must be at least 1"),
+    ],
+    ids=["inverted", "start_page", "too_many_pages", "per_page", "max_concurrency"],
+)
+async def test_get_activity_pages_invalid_arguments(api, kwargs, message):
+    api.get_activities = AsyncMock(return_value=[])
+
+    with pytest.raises(ValueError, match=message):
+        await api.get_activity_pages(**kwargs)
+
+    api.get_activities.assert_not_called()
 
 
-@pytest.mark.asyncio
 async def test_get_activity(api, mock_response):
-    # Setup mock response
-    activity_data = {
-        "id": 1234567890,
-        "name": "Morning Run",
-        "distance": 5000,
-        "moving_time": 1200,
-        "elapsed_time": 1300,
-        "total_elevation_gain": 50,
-        "type": "Run",
-        "sport_type": "Run",
-        "start_date": "2023-01-01T10:00:00Z",
-        "start_date_local": "2023-01-01T10:00:00Z",
-        "timezone": "Europe/London",
-        "achievement_count": 2,
-        "kudos_count": 5,
-        "comment_count": 0,
-        "athlete_count": 1,
-        "photo_count": 0,
-        "trainer": False,
-        "commute": False,
-        "manual": False,
-        "private": False,
-        "flagged": False,
-        "average_speed": 4.167,
-        "max_speed": 5.3,
-        "has_heartrate": True,
-        "average_heartrate": 140,
-        "max_heartrate": 160,
-        "athlete": {"id": 123},
-        "description": "Test description",
-    }
-    mock_response.json.return_value = activity_data
+    mock_response.content = json.dumps(DETAILED_ACTIVITY_DATA).encode()
     api._client.request.return_value = mock_response
 
     # Test get_activity
@@ -173,6 +301,165 @@ async def test_get_activity(api, mock_response):
 
     # Verify response
     assert isinstance(activity, DetailedActivity)
-    assert activity.id == activity_data["id"]
-    assert activity.name == activity_data["name"]
-    assert activity.description == activity_data["description"]
+    assert activity.id == DETAILED_ACTIVITY_DATA["id"]
+    assert activity.name == DETAILED_ACTIVITY_DATA["name"]
+    assert activity.description == DETAILED_ACTIVITY_DATA["description"]
+
+
+async def test_get_activity_is_cached(api, mock_response):
+    mock_response.content = json.dumps(DETAILED_ACTIVITY_DATA).encode()
+    api._client.request.return_value = mock_response
+
+    # Concurrent and repeated lookups are served by a single request
+    first, second = await asyncio.gather(api.get_activity(1234567890), api.get_activity(1234567890))
+    third = await api.get_activity(1234567890)
+
+    api._client.request.assert_called_once()
+    assert first is second is third
+
+    # A different include_all_efforts flag is a separate entry
+    await api.get_activity(1234567890, include_all_efforts=True)
+    assert api._client.request.call_count == 2
+
+
+async def test_get_activity_cache_disabled(api, mock_response):
+    api.settings = api.settings.model_copy(update={"cache_ttl_seconds": 0})
+    mock_response.content = json.dumps(DETAILED_ACTIVITY_DATA).encode()
+    api._client.request.return_value = mock_response
+
+    # With a zero TTL every lookup goes to Strava
+    await api.get_activity(1234567890)
+    await api.get_activity(1234567890)
+
+    assert api._client.request.call_count == 2
+
+
+async def test_get_activity_segments(api, mock_response):
+    # Setup mock response with one segment effort lacking derived fields
+    activity_data = {
+        **DETAILED_ACTIVITY_DATA,
+        "segment_efforts": [
+            {
+                "id": 67890,
+                "name": "Test Segment",
+                "elapsed_time": 180,
+                "moving_time": 180,
+                "start_date": "2023-01-01T10:05:00Z",
+                "start_date_local": "2023-01-01T10:05:00Z",
+                "distance": 1000,
+                "athlete": {"id": 123},
+                "segment": {
+                    "id": 12345,
+                    "name": "Test Segment",
+                    "activity_type": "Run",
+                    "distance": 1000,
+                    "average_grade": 5.0,
+                    "maximum_grade": 10.0,
+                    "elevation_high": 200,
+                    "elevation_low": 150,
+                    "start_latlng": [51.5, -0.1],
+                    "end_latlng": [51.5, -0.2],
+                    "climb_category": 0,
+                    "private": False,
+                    "starred": False,
+                },
+            }
+        ],
+    }
+    mock_response.content = json.dumps(activity_data).encode()
+    api._client.request.return_value = mock_response
+
+    # Test get_activity_segments
+    segments = await api.get_activity_segments(1234567890)
+
+    # Verify request
+    args, kwargs = api._client.request.call_args
+    assert args[1] == "/activities/1234567890"
+    assert kwargs["params"] == {"include_all_efforts": "true"}
+
+    # Verify derived fields were filled in
+    assert len(segments) == 1
+    assert isinstance(segments[0], SegmentEffort)
+    assert segments[0].activity_id == 1234567890
+    assert segments[0].segment_id == 12345
+    assert segments[0].segment.total_elevation_gain == 50
+
+    # The fetched activity itself is not modified
+    activity = await api.get_activity(1234567890, include_all_efforts=True)
+    assert activity.segment_efforts is not None
+    assert "activity_id" not in activity.segment_efforts[0]
+
+
+async def test_request_error_with_error_payload(api, mock_response):
+    mock_response.is_success = False
+    mock_response.status_code = 404
+    mock_response.headers = {"content-type": "application/json; charset=utf-8"}
+    mock_response.content = b'{"message": "Record Not Found", "code": 404}'
+    api._client.request.return_value = mock_response
+
+    with pytest.raises(Exception, match=r"Strava API error: Record Not Found \(code: 404\)"):
+        await api._request("GET", "/activities/1")
+
+
+async def test_request_error_with_unparseable_body(api, mock_response):
+    mock_response.is_success = False
+    mock_response.status_code = 502
+    mock_response.headers = {"content-type": "text/html"}
+    mock_response.content = b"<html>Bad Gateway</html>"
+    api._client.request.return_value = mock_response
+
+    with pytest.raises(Exception, match="Strava API failed: 502 - <html>Bad Gateway</html>"):
+        await api._request("GET", "/activities/1")
+
+
+async def test_request_reuses_cached_response_on_304(api):
+    fresh = MagicMock()
+    fresh.is_success = True
+    fresh.status_code = 200
+    fresh.headers = {"ETag": '"abc123"'}
+    fresh.content = b'{"id": 1}'
+    not_modified = MagicMock()
+    not_modified.is_success = False
+    not_modified.status_code = 304
+    not_modified.headers = {}
+    api._client.request.side_effect = [fresh, not_modified]
+
+    first = await api._request("GET", "/activities/1", params={})
+    second = await api._request("GET", "/activities/1", params={})
+
+    # The second request revalidates with the stored ETag and is served from the stored body
+    _, kwargs = api._client.request.call_args
+    assert kwargs["headers"]["If-None-Match"] == '"abc123"'
+    assert first is fresh
+    assert second.status_code == 200
+    assert second.content == b'{"id": 1}'
+    assert second.headers["ETag"] == '"abc123"'
+    # The shared Authorization headers are not modified
+    assert api._auth_headers == {"Authorization": "Bearer test_access_token"}
+
+
+async def test_get_activity_reuses_model_on_304(api):
+    fresh = MagicMock()
+    fresh.is_success = True
+    fresh.status_code = 200
+    fresh.headers = {"ETag": '"abc123"'}
+    fresh.content = json.dumps(DETAILED_ACTIVITY_DATA).encode()
+    not_modified = MagicMock()
+    not_modified.is_success = False
+    not_modified.status_code = 304
+    not_modified.headers = {}
+    api._client.request.side_effect = [fresh, not_modified]
+
+    first = await api.get_activity(1234567890)
+    # Move the clock past the cache TTL so the next lookup revalidates with Strava
+    with (
+        patch("strava_mcp.api.time", wraps=time) as clock,
+        patch.object(DetailedActivity, "model_validate_json") as validate,
+    ):
+        clock.monotonic.return_value = time.monotonic() + api.settings.cache_ttl_seconds + 1
+        second = await api.get_activity(1234567890)
+
+    # Strava answered 304, so the already parsed activity is returned as-is
+    assert api._client.request.call_count == 2
+    validate.assert_not_called()
+    assert second is first
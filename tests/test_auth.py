@@ -1,7 +1,9 @@
 """Tests for the Strava authentication module."""
 
 import asyncio
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 from fastapi import FastAPI
@@ -10,7 +12,7 @@ from httpx import Response
 from strava_mcp.auth import StravaAuthenticator, get_strava_refresh_token
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client_credentials():
     """Fixture for client credentials."""
     return {
@@ -19,7 +21,7 @@ def client_credentials():
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_token_response():
     """Fixture for token response."""
     return {
@@ -31,6 +33,15 @@ def mock_token_response():
     }
 
 
+@pytest.fixture
+def token_post():
+    """Fixture patching the per-call httpx client; yields its post mock."""
+    with patch("httpx.AsyncClient") as mock_client:
+        yield mock_client.return_value.__aenter__.return_value.post
+
+
+# The app and authenticator stay function-scoped: tests add routes to the app and change
+# the authenticator's state (app, pending flows, token future).
 @pytest.fixture
 def fastapi_app():
     """Fixture for FastAPI app."""
@@ -77,71 +88,106 @@ def test_setup_routes_no_app(authenticator):
         authenticator.setup_routes()
 
 
-@pytest.mark.asyncio
-async def test_exchange_token_success(authenticator, mock_token_response):
+async def test_exchange_token_success(authenticator, mock_token_response, token_post):
     """Test exchanging token successfully."""
     # Setup mock
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_response = MagicMock(spec=Response)
-        mock_response.status_code = 200
-        mock_response.json.return_value = mock_token_response
-        mock_client.return_value.__aenter__.return_value.post.return_value = mock_response
-
-        # Set up a future to receive the token
-        authenticator.token_future = asyncio.Future()
-
-        # Call the handler
-        response = await authenticator.exchange_token(code="test_code")
-
-        # Check response
-        assert response.status_code == 200
-        assert "Authorization successful" in response.body.decode()
+    mock_response = Response(200, json=mock_token_response)
+    token_post.return_value = mock_response
+
+    # Set up a future to receive the token
+    authenticator.token_future = asyncio.get_running_loop().create_future()
+
+    # Call the handler
+    response = await authenticator.exchange_token(code="test_code")
+
+    # Check response
+    assert response.status_code == 200
+    assert "Authorization successful" in response.body.decode()
+
+    # Check token future
+    assert authenticator.token_future.done()
+    assert await authenticator.token_future == "test_refresh_token"
+
+    # Check token was saved
+    assert authenticator.refresh_token == "test_refresh_token"
+
+    # Verify correct API call
+    token_post.assert_called_once()
+    args, kwargs = token_post.call_args
+    assert args[0] == "https://www.strava.com/oauth/token"
+    assert kwargs["data"]["client_id"] == authenticator.client_id
+    assert kwargs["data"]["client_secret"] == authenticator.client_secret
+    assert kwargs["data"]["code"] == "test_code"
+    assert kwargs["data"]["grant_type"] == "authorization_code"
+
+
+async def test_exchange_token_resolves_future_on_its_own_loop(authenticator, mock_token_response, token_post):
+    """Test resolving a future that belongs to an event loop in another thread."""
+    mock_response = Response(200, json=mock_token_response)
+    token_post.return_value = mock_response
+
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        authenticator.token_future = other_loop.create_future()
+        await authenticator.exchange_token(code="test_code")
+
+        # The result is handed to the owning loop rather than set from this one
+        result = asyncio.run_coroutine_threadsafe(asyncio.wait_for(authenticator.token_future, 1), other_loop)
+        assert result.result(timeout=1) == "test_refresh_token"
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+async def test_exchange_token_with_persistent_client(mock_token_response):
+    """Test exchanging token through a client supplied by the caller."""
+    mock_response = Response(200, json=mock_token_response)
+    client = AsyncMock()
+    client.post.return_value = mock_response
+    authenticator = StravaAuthenticator(
+        client_id="test_client_id",
+        client_secret="test_client_secret",
+        client=client,
+    )
 
-        # Check token future
-        assert authenticator.token_future.done()
-        assert await authenticator.token_future == "test_refresh_token"
+    with patch("httpx.AsyncClient") as mock_client_class:
+        token_data = await authenticator._exchange_code_for_token("test_code")
 
-        # Check token was saved
-        assert authenticator.refresh_token == "test_refresh_token"
+        # No per-call client is created
+        mock_client_class.assert_not_called()
 
-        # Verify correct API call
-        mock_client.return_value.__aenter__.return_value.post.assert_called_once()
-        args, kwargs = mock_client.return_value.__aenter__.return_value.post.call_args
-        assert args[0] == "https://www.strava.com/oauth/token"
-        assert kwargs["data"]["client_id"] == authenticator.client_id
-        assert kwargs["data"]["client_secret"] == authenticator.client_secret
-        assert kwargs["data"]["code"] == "test_code"
-        assert kwargs["data"]["grant_type"] == "authorization_code"
+    assert token_data.refresh_token == "test_refresh_token"
+    args, kwargs = client.post.call_args
+    assert args[0] == "https://www.strava.com/oauth/token"
+    assert kwargs["data"]["code"] == "test_code"
 
 
-@pytest.mark.asyncio
-async def test_exchange_token_failure(authenticator):
+async def test_exchange_token_failure(authenticator, token_post):
     """Test exchanging token with failure."""
     # Setup mock
-    with patch("httpx.AsyncClient") as mock_client:
-        mock_response = MagicMock(spec=Response)
-        mock_response.status_code = 400
-        mock_response.text = "Invalid code"
-        mock_client.return_value.__aenter__.return_value.post.return_value = mock_response
+    mock_response = Response(400, text="Invalid code")
+    token_post.return_value = mock_response
 
-        # Set up a future to receive the token
-        authenticator.token_future = asyncio.Future()
+    # Set up a future to receive the token
+    authenticator.token_future = asyncio.get_running_loop().create_future()
 
-        # Call the handler
-        response = await authenticator.exchange_token(code="invalid_code")
+    # Call the handler
+    response = await authenticator.exchange_token(code="invalid_code")
 
-        # Check response
-        assert response.status_code == 200
-        assert "Authorization failed" in response.body.decode()
+    # Check response
+    assert response.status_code == 200
+    assert "Authorization failed" in response.body.decode()
 
-        # Check token future
-        assert authenticator.token_future.done()
-        # We expect a specific exception here, so using pytest.raises is appropriate
-        with pytest.raises(Exception):  # noqa: B017
-            await authenticator.token_future
+    # Check token future
+    assert authenticator.token_future.done()
+    # We expect a specific exception here, so using pytest.raises is appropriate
+    with pytest.raises(Exception):  # noqa: B017
+        await authenticator.token_future
 
 
-@pytest.mark.asyncio
 async def test_start_auth_flow(authenticator):
     """Test starting auth flow."""
     with patch.object(authenticator, "get_authorization_url", return_value="https://example.com/auth"):
@@ -150,86 +196,92 @@ async def test_start_auth_flow(authenticator):
         assert response.headers["location"] == "https://example.com/auth"
 
 
-@pytest.mark.asyncio
-async def test_get_refresh_token(authenticator):
-    """Test getting refresh token."""
-    # Mock the webbrowser.open call
-    with patch("webbrowser.open", return_value=True) as mock_open:
-        with patch.object(authenticator, "get_authorization_url", return_value="https://example.com/auth"):
-            # Set the future result after a delay
-            authenticator.token_future = None  # Reset it so a new one is created
+def authorize_immediately(authenticator):
+    """Build a get_authorization_url stand-in that completes the pending flow right away.
+
+    get_refresh_token registers its future before building the URL, so resolving it here
+    lets the test await the flow directly instead of racing a background task.
+    """
 
-            # Start the token request in background
-            task = asyncio.create_task(authenticator.get_refresh_token())
+    def get_authorization_url(state=None):
+        authenticator.token_future.set_result("test_refresh_token")
+        return "https://example.com/auth"
 
-            # Wait a bit and set the result
-            await asyncio.sleep(0.1)
-            # Initialize the token_future before setting result
-            if not authenticator.token_future:
-                authenticator.token_future = asyncio.Future()
-            authenticator.token_future.set_result("test_refresh_token")
+    return get_authorization_url
 
-            # Get the result
-            token = await task
+
+@pytest.mark.parametrize(
+    "open_browser,browser_opened",
+    [(True, True), (True, False), (False, None)],
+    ids=["browser", "browser_fails", "no_browser"],
+)
+async def test_get_refresh_token(authenticator, open_browser, browser_opened):
+    """Test getting refresh token, with the browser opened, failing to open, or skipped."""
+    with patch("webbrowser.open", return_value=browser_opened) as mock_open:
+        with patch.object(authenticator, "get_authorization_url", side_effect=authorize_immediately(authenticator)):
+            token = await authenticator.get_refresh_token(open_browser=open_browser)
 
             # Verify
             assert token == "test_refresh_token"
-            mock_open.assert_called_once_with("https://example.com/auth")
+            if open_browser:
+                mock_open.assert_called_once_with("https://example.com/auth")
+            else:
+                mock_open.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_get_refresh_token_no_browser(authenticator):
-    """Test getting refresh token without opening browser."""
-    with patch("webbrowser.open") as mock_open:
-        with patch.object(authenticator, "get_authorization_url", return_value="https://example.com/auth"):
-            # Set the future result after a delay
-            authenticator.token_future = None  # Reset it so a new one is created
+async def test_concurrent_flows_resolved_by_state(authenticator):
+    """Test that each OAuth callback resolves the flow matching its state."""
+    with patch("webbrowser.open", return_value=True) as mock_open:
+        first = asyncio.create_task(authenticator.get_refresh_token())
+        second = asyncio.create_task(authenticator.get_refresh_token())
+        await asyncio.sleep(0)
 
-            # Start the token request in background
-            task = asyncio.create_task(authenticator.get_refresh_token(open_browser=False))
+        # Extract the state each flow sent to Strava
+        states = [parse_qs(urlparse(call.args[0]).query)["state"][0] for call in mock_open.call_args_list]
+        assert len(set(states)) == 2
 
-            # Wait a bit and set the result
-            await asyncio.sleep(0.1)
-            # Initialize the token_future before setting result
-            if not authenticator.token_future:
-                authenticator.token_future = asyncio.Future()
-            authenticator.token_future.set_result("test_refresh_token")
+        with patch.object(authenticator, "_exchange_code_for_token", new=AsyncMock()) as mock_exchange:
+            mock_exchange.return_value = MagicMock(refresh_token="second_token")
+            await authenticator.exchange_token(code="code_2", state=states[1])
+            mock_exchange.return_value = MagicMock(refresh_token="first_token")
+            await authenticator.exchange_token(code="code_1", state=states[0])
 
-            # Get the result
-            token = await task
+        assert await first == "first_token"
+        assert await second == "second_token"
+        assert authenticator._pending == {}
 
-            # Verify
-            assert token == "test_refresh_token"
-            mock_open.assert_not_called()
 
+@pytest.mark.parametrize("state", ["forged_state", None], ids=["unknown_state", "missing_state"])
+async def test_exchange_token_rejects_unmatched_state(authenticator, token_post, state):
+    """Test that a callback not matching a pending flow is rejected without resolving it."""
+    with patch("webbrowser.open", return_value=True):
+        flow = asyncio.create_task(authenticator.get_refresh_token())
+        await asyncio.sleep(0)
 
-@pytest.mark.asyncio
-async def test_get_refresh_token_browser_fails(authenticator):
-    """Test getting refresh token with browser opening failing."""
-    with patch("webbrowser.open", return_value=False) as mock_open:
-        with patch.object(authenticator, "get_authorization_url", return_value="https://example.com/auth"):
-            # Set the future result after a delay
-            authenticator.token_future = None  # Reset it so a new one is created
+    response = await authenticator.exchange_token(code="test_code", state=state)
 
-            # Start the token request in background
-            task = asyncio.create_task(authenticator.get_refresh_token())
+    assert response.status_code == 400
+    assert "Authorization failed" in response.body.decode()
+    token_post.assert_not_called()
+    assert not flow.done()
+    assert len(authenticator._pending) == 1
 
-            # Wait a bit and set the result
-            await asyncio.sleep(0.1)
-            # Initialize the token_future before setting result
-            if not authenticator.token_future:
-                authenticator.token_future = asyncio.Future()
-            authenticator.token_future.set_result("test_refresh_token")
+    flow.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flow
 
-            # Get the result
-            token = await task
 
-            # Verify
-            assert token == "test_refresh_token"
-            mock_open.assert_called_once_with("https://example.com/auth")
+async def test_exchange_token_rejects_unknown_state_without_flows(authenticator, token_post):
+    """Test that a stale state is rejected even when no flow is pending."""
+    authenticator.token_future = asyncio.get_running_loop().create_future()
+
+    response = await authenticator.exchange_token(code="test_code", state="stale_state")
+
+    assert response.status_code == 400
+    token_post.assert_not_called()
+    assert not authenticator.token_future.done()
 
 
-@pytest.mark.asyncio
 async def test_get_strava_refresh_token(client_credentials):
     """Test get_strava_refresh_token function."""
     with patch("strava_mcp.auth.StravaAuthenticator") as mock_authenticator_class:
@@ -1,81 +1,88 @@
 """Tests for configuration module."""
 
-import os
-from unittest import mock
+from strava_mcp.config import StravaSettings, get_settings
 
-from strava_mcp.config import StravaSettings
 
-
-def test_strava_settings_defaults():
+def test_strava_settings_defaults(monkeypatch):
     """Test default settings for StravaSettings."""
-    # Use required parameters only
-    with mock.patch.dict(os.environ, {}, clear=True):
-        # Explicitly ensure we're not using STRAVA_REFRESH_TOKEN from environment
-        settings = StravaSettings(
-            client_id="test_client_id",
-            client_secret="test_client_secret",
-            refresh_token=None,
-            base_url="https://www.strava.com/api/v3",
-        )
-
-        assert settings.client_id == "test_client_id"
-        assert settings.client_secret == "test_client_secret"
-        assert settings.refresh_token is None
-        assert settings.base_url == "https://www.strava.com/api/v3"
+    # Make sure no STRAVA_* variable overrides a default
+    for field in StravaSettings.model_fields:
+        monkeypatch.delenv(f"STRAVA_{field.upper()}", raising=False)
+
+    settings = StravaSettings(
+        client_id="test_client_id",
+        client_secret="test_client_secret",
+        refresh_token=None,
+        base_url="https://www.strava.com/api/v3",
+    )
+
+    assert settings.client_id == "test_client_id"
+    assert settings.client_secret == "test_client_secret"
+    assert settings.refresh_token is None
+    assert settings.base_url == "https://www.strava.com/api/v3"
+    assert settings.cache_ttl_seconds == 300
 
 
-def test_strava_settings_from_env():
+def test_strava_settings_from_env(monkeypatch):
     """Test loading settings from environment variables."""
-    with mock.patch.dict(
-        os.environ,
-        {
-            "STRAVA_CLIENT_ID": "env_client_id",
-            "STRAVA_CLIENT_SECRET": "env_client_secret",
-            "STRAVA_REFRESH_TOKEN": "env_refresh_token",
-            "STRAVA_BASE_URL": "https://custom.strava.api/v3",
-        },
-    ):
-        # Even with env vars, we need to provide required params for type checking
-        settings = StravaSettings(
-            client_id="",  # Will be overridden by env vars
-            client_secret="",  # Will be overridden by env vars
-            base_url="",  # Will be overridden by env vars
-        )
+    monkeypatch.setenv("STRAVA_CLIENT_ID", "env_client_id")
+    monkeypatch.setenv("STRAVA_CLIENT_SECRET", "env_client_secret")
+    monkeypatch.setenv("STRAVA_REFRESH_TOKEN", "env_refresh_token")
+    monkeypatch.setenv("STRAVA_BASE_URL", "https://custom.strava.api/v3")
 
-        assert settings.client_id == "env_client_id"
-        assert settings.client_secret == "env_client_secret"
-        assert settings.refresh_token == "env_refresh_token"
-        assert settings.base_url == "https://custom.strava.api/v3"
+    # Required values are read from the environment
+    settings = StravaSettings()  # type: ignore[call-arg]
+
+    assert settings.client_id == "env_client_id"
+    assert settings.client_secret == "env_client_secret"
+    assert settings.refresh_token == "env_refresh_token"
+    assert settings.base_url == "https://custom.strava.api/v3"
 
 
-def test_strava_settings_override():
+def test_strava_settings_override(monkeypatch):
     """Test overriding environment settings with direct values."""
-    with mock.patch.dict(
-        os.environ,
-        {
-            "STRAVA_CLIENT_ID": "env_client_id",
-            "STRAVA_CLIENT_SECRET": "env_client_secret",
-            "STRAVA_REFRESH_TOKEN": "env_refresh_token",
-        },
-    ):
-        settings = StravaSettings(
-            client_id="direct_client_id",
-            client_secret="",  # Will be taken from env vars
-            refresh_token="direct_refresh_token",
-            base_url="https://www.strava.com/api/v3",
-        )
-
-        # Direct values should override environment variables
-        assert settings.client_id == "direct_client_id"
-        assert settings.client_secret == "env_client_secret"
-        assert settings.refresh_token == "direct_refresh_token"
+    monkeypatch.setenv("STRAVA_CLIENT_ID", "env_client_id")
+    monkeypatch.setenv("STRAVA_CLIENT_SECRET", "env_client_secret")
+    monkeypatch.setenv("STRAVA_REFRESH_TOKEN", "env_refresh_token")
+
+    settings = StravaSettings(  # type: ignore[call-arg]
+        client_id="direct_client_id",
+        refresh_token="direct_refresh_token",
+        base_url="https://www.strava.com/api/v3",
+    )  # client_secret is taken from env vars
+
+    # Direct values should override environment variables
+    assert settings.client_id == "direct_client_id"
+    assert settings.client_secret == "env_client_secret"
+    assert settings.refresh_token == "direct_refresh_token"
 
 
 def test_strava_settings_model_config():
     """Test model configuration for StravaSettings."""
-    # Access model_config safely, with type handling
     model_config = StravaSettings.model_config
-    # We can safely access these fields as we know they exist in our configuration
-    assert model_config.get("env_prefix") == "STRAVA_"
-    assert model_config.get("env_file") == ".env"
-    assert model_config.get("env_file_encoding") == "utf-8"
+    keys = ("env_prefix", "env_file", "env_file_encoding", "frozen")
+
+    # One comparison, so a mismatch shows every differing key in a single diff
+    assert {key: model_config.get(key) for key in keys} == {
+        "env_prefix": "STRAVA_",
+        "env_file": ".env",
+        "env_file_encoding": "utf-8",
+        "frozen": True,
+    }
+
+
+def test_get_settings_is_cached(monkeypatch):
+    """Test that settings are loaded from the environment only once."""
+    monkeypatch.setenv("STRAVA_CLIENT_ID", "env_client_id")
+    monkeypatch.setenv("STRAVA_CLIENT_SECRET", "env_client_secret")
+    monkeypatch.delenv("STRAVA_BASE_URL", raising=False)
+
+    get_settings.cache_clear()
+    try:
+        settings = get_settings()
+
+        assert settings.client_id == "env_client_id"
+        assert settings.base_url == "https://www.strava.com/api/v3"
+        assert get_settings() is settings
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,35 @@
+"""Tests for the server entry point."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from strava_mcp import main as main_module
+
+
+@pytest.mark.parametrize("use_uvloop", [False, pytest.param(True, id="uvloop")])
+def test_main_runs_tasks_on_server_loop(use_uvloop):
+    """Test that tasks and gathers work on the loop main() runs the server on."""
+    if use_uvloop and not main_module.USE_UVLOOP:
+        pytest.skip("uvloop is not installed")
+
+    loop_types = []
+
+    async def run_stdio_async():
+        async def double(value):
+            await asyncio.sleep(0)
+            return value * 2
+
+        loop_types.append(type(asyncio.get_running_loop()).__module__)
+        task = asyncio.create_task(double(1))
+        assert await asyncio.gather(task, double(2)) == [2, 4]
+
+    with (
+        patch.object(main_module, "USE_UVLOOP", use_uvloop),
+        patch.object(main_module.mcp, "run_stdio_async", run_stdio_async),
+    ):
+        main_module.main()
+
+    assert len(loop_types) == 1
+    assert loop_types[0].startswith("uvloop") == use_uvloop
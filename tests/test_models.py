@@ -1,94 +1,110 @@
 """Tests for the Strava models."""
 
+import json
 from datetime import datetime
+from types import MappingProxyType
 
 import pytest
 from pydantic import ValidationError
 
 from strava_mcp.models import Activity, DetailedActivity, ErrorResponse, Segment, SegmentEffort
 
+# Parsed forms of the start dates in the payload fixtures below
+START_DATE = datetime.fromisoformat("2023-01-01T10:00:00+00:00")
+EFFORT_START_DATE = datetime.fromisoformat("2023-01-01T10:05:00+00:00")
 
-@pytest.fixture
+
+# The payload fixtures are built once per session and read-only, so a test that needs to
+# change one has to take a copy first.
+@pytest.fixture(scope="session")
 def activity_data():
     """Fixture with valid activity data."""
-    return {
-        "id": 1234567890,
-        "name": "Morning Run",
-        "distance": 5000.0,
-        "moving_time": 1200,
-        "elapsed_time": 1300,
-        "total_elevation_gain": 50.0,
-        "type": "Run",
-        "sport_type": "Run",
-        "start_date": "2023-01-01T10:00:00Z",
-        "start_date_local": "2023-01-01T10:00:00Z",
-        "timezone": "Europe/London",
-        "achievement_count": 2,
-        "kudos_count": 5,
-        "comment_count": 0,
-        "athlete_count": 1,
-        "photo_count": 0,
-        "trainer": False,
-        "commute": False,
-        "manual": False,
-        "private": False,
-        "flagged": False,
-        "average_speed": 4.167,
-        "max_speed": 5.3,
-        "has_heartrate": True,
-        "average_heartrate": 140.0,
-        "max_heartrate": 160.0,
-    }
-
-
-@pytest.fixture
+    return MappingProxyType(
+        {
+            "id": 1234567890,
+            "name": "Morning Run",
+            "distance": 5000.0,
+            "moving_time": 1200,
+            "elapsed_time": 1300,
+            "total_elevation_gain": 50.0,
+            "type": "Run",
+            "sport_type": "Run",
+            "start_date": "2023-01-01T10:00:00Z",
+            "start_date_local": "2023-01-01T10:00:00Z",
+            "timezone": "Europe/London",
+            "achievement_count": 2,
+            "kudos_count": 5,
+            "comment_count": 0,
+            "athlete_count": 1,
+            "photo_count": 0,
+            "trainer": False,
+            "commute": False,
+            "manual": False,
+            "private": False,
+            "flagged": False,
+            "average_speed": 4.167,
+            "max_speed": 5.3,
+            "has_heartrate": True,
+            "average_heartrate": 140.0,
+            "max_heartrate": 160.0,
+        }
+    )
+
+
+@pytest.fixture(scope="session")
 def detailed_activity_data(activity_data):
     """Fixture with valid detailed activity data."""
-    return {
-        **activity_data,
-        "description": "Test description",
-        "athlete": {"id": 123},
-        "calories": 500.0,
-    }
+    return MappingProxyType(
+        {
+            **activity_data,
+            "description": "Test description",
+            "athlete": {"id": 123},
+            "calories": 500.0,
+        }
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def segment_data():
     """Fixture with valid segment data."""
-    return {
-        "id": 12345,
-        "name": "Test Segment",
-        "activity_type": "Run",
-        "distance": 1000.0,
-        "average_grade": 5.0,
-        "maximum_grade": 10.0,
-        "elevation_high": 200.0,
-        "elevation_low": 150.0,
-        "total_elevation_gain": 50.0,
-        "start_latlng": [51.5, -0.1],
-        "end_latlng": [51.5, -0.2],
-        "climb_category": 0,
-        "private": False,
-        "starred": False,
-    }
-
-
-@pytest.fixture
+    return MappingProxyType(
+        {
+            "id": 12345,
+            "name": "Test Segment",
+            "activity_type": "Run",
+            "distance": 1000.0,
+            "average_grade": 5.0,
+            "maximum_grade": 10.0,
+            "elevation_high": 200.0,
+            "elevation_low": 150.0,
+            "total_elevation_gain": 50.0,
+            "start_latlng": [51.5, -0.1],
+            "end_latlng": [51.5, -0.2],
+            "climb_category": 0,
+            "private": False,
+            "starred": False,
+        }
+    )
+
+
+@pytest.fixture(scope="session")
 def segment_effort_data(segment_data):
     """Fixture with valid segment effort data."""
-    return {
-        "id": 67890,
-        "activity_id": 1234567890,
-        "segment_id": 12345,
-        "name": "Test Segment",
-        "elapsed_time": 180,
-        "moving_time": 180,
-        "start_date": "2023-01-01T10:05:00Z",
-        "start_date_local": "2023-01-01T10:05:00Z",
-        "distance": 1000.0,
-        "athlete": {"id": 123},
-        "segment": segment_data,
-    }
+    return MappingProxyType(
+        {
+            "id": 67890,
+            "activity_id": 1234567890,
+            "segment_id": 12345,
+            "name": "Test Segment",
+            "elapsed_time": 180,
+            "moving_time": 180,
+            "start_date": "2023-01-01T10:05:00Z",
+            "start_date_local": "2023-01-01T10:05:00Z",
+            "distance": 1000.0,
+            "athlete": {"id": 123},
+            "segment": dict(segment_data),
+        }
+    )
 
 
 def test_activity_model(activity_data):
@@ -98,8 +114,8 @@ def test_activity_model(activity_data):
     assert activity.id == activity_data["id"]
     assert activity.name == activity_data["name"]
     assert activity.distance == activity_data["distance"]
-    assert activity.start_date == datetime.fromisoformat(activity_data["start_date"].replace("Z", "+00:00"))
-    assert activity.start_date_local == datetime.fromisoformat(activity_data["start_date_local"].replace("Z", "+00:00"))
+    assert activity.start_date == START_DATE
+    assert activity.start_date_local == START_DATE
     assert activity.average_heartrate == activity_data["average_heartrate"]
     assert activity.max_heartrate == activity_data["max_heartrate"]
 
@@ -195,10 +211,8 @@ def test_segment_effort_model(segment_effort_data):
     assert effort.name == segment_effort_data["name"]
     assert effort.elapsed_time == segment_effort_data["elapsed_time"]
     assert effort.moving_time == segment_effort_data["moving_time"]
-    assert effort.start_date == datetime.fromisoformat(segment_effort_data["start_date"].replace("Z", "+00:00"))
-    assert effort.start_date_local == datetime.fromisoformat(
-        segment_effort_data["start_date_local"].replace("Z", "+00:00")
-    )
+    assert effort.start_date == EFFORT_START_DATE
+    assert effort.start_date_local == EFFORT_START_DATE
     assert effort.distance == segment_effort_data["distance"]
     assert effort.athlete == segment_effort_data["athlete"]
 
@@ -237,6 +251,26 @@ def test_segment_effort_missing_fields(segment_effort_data):
         SegmentEffort(**data)
 
 
+def test_models_are_frozen(segment_effort_data):
+    """Test that parsed Strava models cannot be modified."""
+    effort = SegmentEffort(**segment_effort_data)
+
+    with pytest.raises(ValidationError):
+        effort.name = "Changed"  # type: ignore[misc]
+
+
+def test_segment_effort_from_strava(segment_effort_data):
+    """Test building a SegmentEffort from a trusted payload without validation."""
+    effort = SegmentEffort._from_strava(segment_effort_data)
+
+    assert effort.id == segment_effort_data["id"]
+    assert effort.start_date == SegmentEffort(**segment_effort_data).start_date
+    assert isinstance(effort.segment, Segment)
+    assert effort.segment.id == segment_effort_data["segment"]["id"]
+    # Same serialized output as the validated model
+    assert effort.model_dump(mode="json") == SegmentEffort(**segment_effort_data).model_dump(mode="json")
+
+
 def test_error_response():
     """Test the ErrorResponse model."""
     data = {"message": "Resource not found", "code": 404}
@@ -245,3 +279,34 @@ def test_error_response():
 
     assert error.message == "Resource not found"
     assert error.code == 404
+
+
+def test_to_json_is_cached(segment_effort_data):
+    """Test that the tool JSON is computed once and leaves the model unchanged."""
+    effort = SegmentEffort(**segment_effort_data)
+
+    assert effort.to_json() is effort.to_json()
+    assert json.loads(effort.to_json()) == json.loads(effort.model_dump_json())
+    assert effort == SegmentEffort(**segment_effort_data)
+
+
+def test_to_json_keeps_unset_optional_fields(activity_data):
+    """Test that unset optional fields are sent as null rather than left out."""
+    data = activity_data.copy()
+    data.pop("average_heartrate")
+
+    payload = json.loads(Activity(**data).to_json())
+
+    assert "average_heartrate" in payload
+    assert payload["average_heartrate"] is None
+
+
+def test_to_json_not_carried_to_copies(segment_effort_data):
+    """Test that an updated copy is serialized from its own fields."""
+    effort = SegmentEffort(**segment_effort_data)
+    effort.to_json()
+
+    renamed = effort.model_copy(update={"name": "CHANGED"})
+
+    assert json.loads(renamed.to_json())["name"] == "CHANGED"
+    assert json.loads(effort.to_json())["name"] == segment_effort_data["name"]
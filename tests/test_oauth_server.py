@@ -1,6 +1,7 @@
 """Tests for the Strava OAuth server module."""
 
 import asyncio
+import logging
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -27,7 +28,11 @@ def oauth_server(client_credentials):
     )
 
 
-@pytest.mark.asyncio
+def test_token_future_created_lazily(oauth_server):
+    """Test that no future is bound to a loop before the flow starts."""
+    assert oauth_server.token_future is None
+
+
 async def test_initialize_server(oauth_server):
     """Test initializing the server."""
     # Mock the OAuth server's dependencies directly
@@ -45,6 +50,7 @@ async def test_initialize_server(oauth_server):
             # Verify FastAPI app was created
             assert oauth_server.app is not None
             assert oauth_server.app.title == "Strava OAuth"
+            assert oauth_server.app.openapi_url is None
 
             # Verify authenticator was created and configured
             mock_authenticator_class.assert_called_once_with(
@@ -53,10 +59,14 @@ async def test_initialize_server(oauth_server):
                 app=oauth_server.app,
                 host=oauth_server.host,
                 port=oauth_server.port,
+                client=oauth_server.http_client,
             )
             assert oauth_server.authenticator == mock_authenticator
+            assert oauth_server.http_client is not None
+            await oauth_server.http_client.aclose()
 
-            # Verify token future was stored in authenticator
+            # Verify token future was created on the running loop and stored in authenticator
+            assert oauth_server.token_future.get_loop() is asyncio.get_running_loop()
             assert mock_authenticator.token_future is oauth_server.token_future
 
             # Verify routes were set up
@@ -67,7 +77,6 @@ async def test_initialize_server(oauth_server):
             assert oauth_server.server_task == mock_task
 
 
-@pytest.mark.asyncio
 async def test_run_server(oauth_server):
     """Test running the server."""
     with patch("uvicorn.Server") as mock_server_class:
@@ -98,7 +107,6 @@ async def test_run_server(oauth_server):
             assert oauth_server.server == mock_server
 
 
-@pytest.mark.asyncio
 async def test_run_server_exception(oauth_server):
     """Test running the server with an exception."""
     with patch("uvicorn.Server") as mock_server_class:
@@ -112,7 +120,7 @@ async def test_run_server_exception(oauth_server):
 
             # Create app and token future
             oauth_server.app = FastAPI()
-            oauth_server.token_future = asyncio.Future()
+            oauth_server.token_future = asyncio.get_running_loop().create_future()
 
             # Test method
             await oauth_server._run_server()
@@ -123,7 +131,6 @@ async def test_run_server_exception(oauth_server):
                 await oauth_server.token_future
 
 
-@pytest.mark.asyncio
 async def test_stop_server(oauth_server):
     """Test stopping the server."""
     # Setup server and task
@@ -141,7 +148,17 @@ async def test_stop_server(oauth_server):
         mock_wait_for.assert_called_once_with(oauth_server.server_task, timeout=5.0)
 
 
-@pytest.mark.asyncio
+async def test_stop_server_closes_http_client(oauth_server):
+    """Test that stopping the server closes the token exchange client."""
+    http_client = AsyncMock()
+    oauth_server.http_client = http_client
+
+    await oauth_server._stop_server()
+
+    http_client.aclose.assert_awaited_once()
+    assert oauth_server.http_client is None
+
+
 async def test_stop_server_timeout(oauth_server):
     """Test stopping the server with timeout."""
     # Setup server and task
@@ -159,7 +176,6 @@ async def test_stop_server_timeout(oauth_server):
         mock_wait_for.assert_called_once_with(oauth_server.server_task, timeout=5.0)
 
 
-@pytest.mark.asyncio
 async def test_get_token(oauth_server):
     """Test getting a token."""
     # Setup mocks
@@ -168,11 +184,14 @@ async def test_get_token(oauth_server):
     oauth_server.authenticator = MagicMock()
     oauth_server.authenticator.get_authorization_url = MagicMock(return_value="https://example.com/auth")
 
-    with patch("webbrowser.open") as mock_open:
-        # Prepare token future
-        oauth_server.token_future = asyncio.Future()
+    oauth_server.token_future = asyncio.get_running_loop().create_future()
+
+    # The callback delivers the token once the browser has been opened
+    def open_browser(url):
         oauth_server.token_future.set_result("test_refresh_token")
+        return True
 
+    with patch("webbrowser.open", side_effect=open_browser) as mock_open:
         # Test method
         token = await oauth_server.get_token()
 
@@ -184,7 +203,44 @@ async def test_get_token(oauth_server):
         oauth_server._stop_server.assert_called_once()
 
 
-@pytest.mark.asyncio
+async def test_get_token_without_browser(oauth_server, caplog):
+    """Test that the authorization URL is logged instead of opened when the browser is disabled."""
+    # Setup mocks
+    oauth_server._initialize_server = AsyncMock()
+    oauth_server._stop_server = AsyncMock()
+    oauth_server.authenticator = MagicMock()
+    oauth_server.authenticator.get_authorization_url = MagicMock(return_value="https://example.com/auth")
+
+    oauth_server.token_future = asyncio.get_running_loop().create_future()
+    oauth_server.token_future.get_loop().call_soon(oauth_server.token_future.set_result, "test_refresh_token")
+
+    with patch("webbrowser.open") as mock_open, caplog.at_level(logging.INFO):
+        # Test method
+        token = await oauth_server.get_token(open_browser=False)
+
+        # Verify
+        assert token == "test_refresh_token"
+        mock_open.assert_not_called()
+        assert "https://example.com/auth" in caplog.text
+        oauth_server._stop_server.assert_called_once()
+
+
+async def test_get_token_already_settled(oauth_server):
+    """Test that no browser is opened when the flow failed before it started."""
+    oauth_server._initialize_server = AsyncMock()
+    oauth_server._stop_server = AsyncMock()
+    oauth_server.authenticator = MagicMock()
+    oauth_server.token_future = asyncio.get_running_loop().create_future()
+    oauth_server.token_future.set_exception(OSError("Address already in use"))
+
+    with patch("webbrowser.open") as mock_open:
+        with pytest.raises(Exception, match="OAuth flow failed: Address already in use"):
+            await oauth_server.get_token()
+
+        mock_open.assert_not_called()
+        oauth_server._stop_server.assert_called_once()
+
+
 async def test_get_token_no_authenticator(oauth_server):
     """Test getting a token with no authenticator."""
     # Setup mocks
@@ -202,47 +258,33 @@ async def test_get_token_no_authenticator(oauth_server):
     # oauth_server._stop_server.assert_called_once()
 
 
-@pytest.mark.asyncio
-async def test_get_token_cancelled(oauth_server):
-    """Test getting a token that is cancelled."""
-    # Setup mocks
-    oauth_server._initialize_server = AsyncMock()
-    oauth_server._stop_server = AsyncMock()
-    oauth_server.authenticator = MagicMock()
-    oauth_server.authenticator.get_authorization_url = MagicMock(return_value="https://example.com/auth")
+def _cancel(future):
+    future.cancel()
 
-    with patch("webbrowser.open") as mock_open:
-        # Prepare token future with cancellation
-        oauth_server.token_future = asyncio.Future()
-        oauth_server.token_future.cancel()
-
-        # Test method
-        with pytest.raises(Exception, match="OAuth flow was cancelled"):
-            await oauth_server.get_token()
 
-        # Verify
-        oauth_server._initialize_server.assert_called_once()
-        oauth_server.authenticator.get_authorization_url.assert_called_once()
-        mock_open.assert_called_once_with("https://example.com/auth")
-        oauth_server._stop_server.assert_called_once()
+def _fail(future):
+    future.set_exception(Exception("Test error"))
 
 
-@pytest.mark.asyncio
-async def test_get_token_exception(oauth_server):
-    """Test getting a token with exception."""
+@pytest.mark.parametrize(
+    "settle, expected_msg",
+    [(_cancel, "OAuth flow was cancelled"), (_fail, "OAuth flow failed: Test error")],
+    ids=["cancelled", "exception"],
+)
+async def test_get_token_failure(oauth_server, settle, expected_msg):
+    """Test getting a token when the flow is cancelled or fails while waiting for the callback."""
     # Setup mocks
     oauth_server._initialize_server = AsyncMock()
     oauth_server._stop_server = AsyncMock()
     oauth_server.authenticator = MagicMock()
     oauth_server.authenticator.get_authorization_url = MagicMock(return_value="https://example.com/auth")
 
-    with patch("webbrowser.open") as mock_open:
-        # Prepare token future with exception
-        oauth_server.token_future = asyncio.Future()
-        oauth_server.token_future.set_exception(Exception("Test error"))
+    oauth_server.token_future = asyncio.get_running_loop().create_future()
 
+    # The future settles once the browser has been opened
+    with patch("webbrowser.open", side_effect=lambda url: settle(oauth_server.token_future)) as mock_open:
         # Test method
-        with pytest.raises(Exception, match="OAuth flow failed: Test error"):
+        with pytest.raises(Exception, match=expected_msg):
             await oauth_server.get_token()
 
         # Verify
@@ -252,9 +294,9 @@ async def test_get_token_exception(oauth_server):
         oauth_server._stop_server.assert_called_once()
 
 
-@pytest.mark.asyncio
-async def test_get_refresh_token_from_oauth(client_credentials):
+async def test_get_refresh_token_from_oauth(client_credentials, monkeypatch):
     """Test get_refresh_token_from_oauth function."""
+    monkeypatch.delenv("STRAVA_OAUTH_NO_BROWSER", raising=False)
     with patch("strava_mcp.oauth_server.StravaOAuthServer") as mock_oauth_server_class:
         # Setup mock
         mock_server = MagicMock()
@@ -269,4 +311,16 @@ async def test_get_refresh_token_from_oauth(client_credentials):
         mock_oauth_server_class.assert_called_once_with(
             client_credentials["client_id"], client_credentials["client_secret"]
         )
-        mock_server.get_token.assert_called_once()
+        mock_server.get_token.assert_called_once_with(open_browser=True)
+
+
+async def test_get_refresh_token_from_oauth_no_browser(client_credentials, monkeypatch):
+    """Test that STRAVA_OAUTH_NO_BROWSER keeps the OAuth flow from opening the browser."""
+    monkeypatch.setenv("STRAVA_OAUTH_NO_BROWSER", "1")
+    with patch("strava_mcp.oauth_server.StravaOAuthServer") as mock_oauth_server_class:
+        mock_server = mock_oauth_server_class.return_value
+        mock_server.get_token = AsyncMock(return_value="test_refresh_token")
+
+        await get_refresh_token_from_oauth(client_credentials["client_id"], client_credentials["client_secret"])
+
+        mock_server.get_token.assert_called_once_with(open_browser=False)
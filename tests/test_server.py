@@ -1,32 +1,30 @@
-from datetime import datetime
+import asyncio
+import json
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from strava_mcp.models import Activity, DetailedActivity, Segment, SegmentEffort
-
-# Patch the StravaOAuthServer._run_server method to prevent coroutine warnings
-# This must be at the module level before any imports that might create the coroutine
-with patch("strava_mcp.oauth_server.StravaOAuthServer._run_server", new_callable=AsyncMock):
-    # Now imports will use the patched version
-    pass
+from strava_mcp.server import (
+    get_activity,
+    get_activity_segments,
+    get_user_activities,
+    get_user_activities_bulk,
+    lifespan,
+)
 
 
 class MockContext:
     """Mock MCP context for testing."""
 
     def __init__(self, service):
-        self.request_context = MagicMock()
-        self.request_context.lifespan_context = {"service": service}
+        self.request_context = SimpleNamespace(lifespan_context={"service": service})
 
 
 @pytest.fixture
 def mock_service():
-    mock = AsyncMock()
-    mock.get_activities = AsyncMock()
-    mock.get_activity = AsyncMock()
-    mock.get_activity_segments = AsyncMock()
-    return mock
+    # Attributes of an AsyncMock are AsyncMocks themselves, one per service method used
+    return AsyncMock()
 
 
 @pytest.fixture
@@ -34,47 +32,10 @@ def mock_ctx(mock_service):
     return MockContext(mock_service)
 
 
-@pytest.mark.asyncio
-async def test_get_user_activities(mock_ctx, mock_service):
-    # Setup mock data
-    mock_activity = Activity(
-        id=1234567890,
-        name="Morning Run",
-        distance=5000,
-        moving_time=1200,
-        elapsed_time=1300,
-        total_elevation_gain=50,
-        type="Run",
-        sport_type="Run",
-        start_date=datetime.fromisoformat("2023-01-01T10:00:00+00:00"),
-        start_date_local=datetime.fromisoformat("2023-01-01T10:00:00+00:00"),
-        timezone="Europe/London",
-        achievement_count=2,
-        kudos_count=5,
-        comment_count=0,
-        athlete_count=1,
-        photo_count=0,
-        trainer=False,
-        commute=False,
-        manual=False,
-        private=False,
-        flagged=False,
-        average_speed=4.167,
-        max_speed=5.3,
-        has_heartrate=True,
-        average_heartrate=140,
-        max_heartrate=160,
-        # Add required fields with default values
-        map=None,
-        workout_type=None,
-        elev_high=None,
-        elev_low=None,
-    )
-    mock_service.get_activities.return_value = [mock_activity]
+async def test_get_user_activities(mock_ctx, mock_service, sample_activity):
+    mock_service.get_activities.return_value = [sample_activity]
 
     # Test tool
-    from strava_mcp.server import get_user_activities
-
     result = await get_user_activities(mock_ctx)
 
     # Verify service call
@@ -82,118 +43,42 @@ async def test_get_user_activities(mock_ctx, mock_service):
 
     # Verify result
     assert len(result) == 1
-    assert result[0]["id"] == mock_activity.id
-    assert result[0]["name"] == mock_activity.name
-
-
-@pytest.mark.asyncio
-async def test_get_activity(mock_ctx, mock_service):
-    # Setup mock data
-    mock_activity = DetailedActivity(
-        id=1234567890,
-        name="Morning Run",
-        distance=5000,
-        moving_time=1200,
-        elapsed_time=1300,
-        total_elevation_gain=50,
-        type="Run",
-        sport_type="Run",
-        start_date=datetime.fromisoformat("2023-01-01T10:00:00+00:00"),
-        start_date_local=datetime.fromisoformat("2023-01-01T10:00:00+00:00"),
-        timezone="Europe/London",
-        achievement_count=2,
-        kudos_count=5,
-        comment_count=0,
-        athlete_count=1,
-        photo_count=0,
-        trainer=False,
-        commute=False,
-        manual=False,
-        private=False,
-        flagged=False,
-        average_speed=4.167,
-        max_speed=5.3,
-        has_heartrate=True,
-        average_heartrate=140,
-        max_heartrate=160,
-        athlete={"id": 123},
-        description="Test description",
-        # Add required fields with default values
-        map=None,
-        workout_type=None,
-        elev_high=None,
-        elev_low=None,
-        calories=None,
-        segment_efforts=None,
-        splits_metric=None,
-        splits_standard=None,
-        best_efforts=None,
-        photos=None,
-        gear=None,
-        device_name=None,
-    )
-    mock_service.get_activity.return_value = mock_activity
+    assert json.loads(result[0])["id"] == sample_activity.id
+    assert json.loads(result[0])["name"] == sample_activity.name
+    # Optional fields without a value are sent as null
+    assert json.loads(result[0])["workout_type"] is None
+
+
+async def test_get_user_activities_bulk(mock_ctx, mock_service):
+    mock_activity = MagicMock()
+    mock_activity.to_json.return_value = '{"id": 1234567890}'
+    mock_service.get_activities_bulk.return_value = [mock_activity, mock_activity]
+
+    result = await get_user_activities_bulk(mock_ctx, start_page=1, end_page=2)
+
+    mock_service.get_activities_bulk.assert_called_once_with(None, None, 1, 2, 30)
+    assert result == ['{"id": 1234567890}', '{"id": 1234567890}']
 
-    # Test tool
-    from strava_mcp.server import get_activity
 
+async def test_get_activity(mock_ctx, mock_service, sample_detailed_activity):
+    mock_service.get_activity.return_value = sample_detailed_activity
+
+    # Test tool
     result = await get_activity(mock_ctx, 1234567890)
 
     # Verify service call
     mock_service.get_activity.assert_called_once_with(1234567890, False)
 
     # Verify result
-    assert result["id"] == mock_activity.id
-    assert result["name"] == mock_activity.name
-    assert result["description"] == mock_activity.description
-
-
-@pytest.mark.asyncio
-async def test_get_activity_segments(mock_ctx, mock_service):
-    # Setup mock data
-    mock_segment = SegmentEffort(
-        id=67890,
-        activity_id=1234567890,
-        segment_id=12345,
-        name="Test Segment",
-        elapsed_time=180,
-        moving_time=180,
-        start_date=datetime.fromisoformat("2023-01-01T10:05:00+00:00"),
-        start_date_local=datetime.fromisoformat("2023-01-01T10:05:00+00:00"),
-        distance=1000,
-        athlete={"id": 123},
-        segment=Segment(
-            id=12345,
-            name="Test Segment",
-            activity_type="Run",
-            distance=1000,
-            average_grade=5.0,
-            maximum_grade=10.0,
-            elevation_high=200,
-            elevation_low=150,
-            total_elevation_gain=50,
-            start_latlng=[51.5, -0.1],
-            end_latlng=[51.5, -0.2],
-            climb_category=0,
-            private=False,
-            starred=False,
-            city=None,
-            state=None,
-            country=None,
-        ),
-        # Add required fields with default values
-        average_watts=None,
-        device_watts=None,
-        average_heartrate=None,
-        max_heartrate=None,
-        pr_rank=None,
-        achievements=None,
-    )
-    mock_service.get_activity_segments.return_value = [mock_segment]
+    assert json.loads(result)["id"] == sample_detailed_activity.id
+    assert json.loads(result)["name"] == sample_detailed_activity.name
+    assert json.loads(result)["description"] == sample_detailed_activity.description
 
-    # Test tool
-    from strava_mcp.server import get_activity_segments
 
+async def test_get_activity_segments(mock_ctx, mock_service, sample_segment_effort):
+    mock_service.get_activity_segments.return_value = [sample_segment_effort]
+
+    # Test tool
     result = await get_activity_segments(mock_ctx, 1234567890)
 
     # Verify service call
@@ -201,5 +86,63 @@ async def test_get_activity_segments(mock_ctx, mock_service):
 
     # Verify result
     assert len(result) == 1
-    assert result[0]["id"] == mock_segment.id
-    assert result[0]["name"] == mock_segment.name
+    assert json.loads(result[0])["id"] == sample_segment_effort.id
+    assert json.loads(result[0])["name"] == sample_segment_effort.name
+
+
+async def test_tool_without_service_in_context():
+    ctx = MockContext(None)
+    ctx.request_context.lifespan_context = {}
+
+    with pytest.raises(ValueError, match="Service not available"):
+        await get_activity(ctx, 1234567890)
+
+
+async def test_tool_logs_and_reraises_errors(mock_ctx, mock_service, caplog):
+    mock_service.get_activity.side_effect = Exception("Strava API failed: 404")
+
+    with pytest.raises(Exception, match="404"):
+        await get_activity(mock_ctx, 1234567890)
+
+    assert "Error in get_activity tool: Strava API failed: 404" in caplog.text
+
+
+async def test_lifespan_shares_service_between_sessions():
+    settings = MagicMock(client_id="test_client_id", client_secret="test_client_secret")
+    with (
+        patch("strava_mcp.server.get_settings", return_value=settings),
+        patch("strava_mcp.server.StravaService") as mock_service_class,
+    ):
+        service = mock_service_class.return_value
+        service.initialize = AsyncMock()
+        service.close = AsyncMock()
+
+        async with lifespan(MagicMock()) as first, lifespan(MagicMock()) as second:
+            # Both sessions get the same service
+            assert first["service"] is second["service"] is service
+            mock_service_class.assert_called_once()
+
+        # Closed only once the last session ends
+        service.close.assert_awaited_once()
+
+
+async def test_lifespan_service_per_event_loop():
+    settings = MagicMock(client_id="test_client_id", client_secret="test_client_secret")
+    with (
+        patch("strava_mcp.server.get_settings", return_value=settings),
+        patch("strava_mcp.server.StravaService") as mock_service_class,
+    ):
+        mock_service_class.side_effect = lambda *args: MagicMock(initialize=AsyncMock(), close=AsyncMock())
+
+        async def open_session():
+            async with lifespan(MagicMock()) as context:
+                return context["service"]
+
+        async with lifespan(MagicMock()) as context:
+            # A session on another event loop gets its own service instead of
+            # contending for this loop's lock and connection pools
+            other = await asyncio.to_thread(asyncio.run, open_session())
+            assert other is not context["service"]
+            other.close.assert_awaited_once()
+
+        context["service"].close.assert_awaited_once()